@@ -0,0 +1,121 @@
+import weakref
+import threading
+import numpy as np
+import pandas as pd
+from dataset_digest import build_digest
+from moments import Moments
+from comoments import CoMoments
+from cardinality_sketch import profile_columns, constant_columns
+from quantile_sketch import column_quantiles
+from type_inference import infer_types
+
+# id(df) -> AnalysisContext, dropped when the frame is garbage collected
+_contexts = {}
+_contexts_lock = threading.Lock()
+# Rows at fixed, evenly spaced positions hashed into the fingerprint to catch in-place value edits
+PROBE_ROWS = 64
+
+
+class AnalysisContext:
+    """Lazily computed, memoised artifacts derived from one DataFrame.
+
+    Each artifact (describe tables, null counts, moments, correlations,
+    column profiles, the LLM digest, ...) is computed on first request and
+    reused afterwards. The cache is dropped automatically when the frame's
+    shape, columns or dtypes change, or when the values of a few probe rows
+    change. Edits that miss every probe row are not seen, so call
+    `invalidate()` after editing values in place. Artifacts are shared between
+    callers, so treat them as read-only. The context only holds a weak
+    reference to the frame.
+    """
+
+    def __init__(self, df):
+        self._ref = weakref.ref(df)
+        self._cache = {}
+        self._fingerprint = None
+        self._lock = threading.RLock()
+
+    @property
+    def df(self):
+        df = self._ref()
+        if df is None:
+            raise ValueError("The DataFrame behind this AnalysisContext no longer exists")
+        return df
+
+    @staticmethod
+    def _value_probe(df):
+        positions = np.unique(np.linspace(0, len(df) - 1, min(PROBE_ROWS, len(df))).astype(int))
+        try:
+            return pd.util.hash_pandas_object(df.iloc[positions], index=True).to_numpy().tobytes()
+        except TypeError:
+            return None  # Unhashable cells (lists, dicts); rely on invalidate()
+
+    @classmethod
+    def _fingerprint_of(cls, df):
+        return df.shape, tuple(df.columns), tuple(str(dtype) for dtype in df.dtypes), cls._value_probe(df)
+
+    def invalidate(self):
+        """Forget every computed artifact."""
+        with self._lock:
+            self._cache.clear()
+
+    def get(self, key, compute):
+        """Return the artifact stored under `key`, computing it with `compute(df)` on first use."""
+        with self._lock:
+            df = self.df
+            fingerprint = self._fingerprint_of(df)
+            if fingerprint != self._fingerprint:
+                self._cache.clear()
+                self._fingerprint = fingerprint
+            if key not in self._cache:
+                self._cache[key] = compute(df)
+            return self._cache[key]
+
+    # --- Artifacts ---
+    def numeric(self):
+        return self.get("numeric", lambda df: df.select_dtypes(include=[np.number]))
+
+    def numeric_columns(self):
+        return self.get("numeric_columns", lambda df: self.numeric().columns.tolist())
+
+    def describe(self, include=None):
+        return self.get(("describe", include), lambda df: df.describe(include=include))
+
+    def null_counts(self):
+        return self.get("null_counts", lambda df: df.isnull().sum())
+
+    def moments(self):
+        """Count, mean, std, min, max, skew and kurtosis of numeric columns, from one pass."""
+        return self.get("moments", lambda df: Moments.from_frame(df).describe())
+
+    def quartiles(self):
+        """(25/50/75% quantiles of numeric columns, {column: rank error}); sketched above SKETCH_THRESHOLD rows."""
+        return self.get("quartiles", lambda df: column_quantiles(df, [0.25, 0.5, 0.75]))
+
+    def correlation(self):
+        return self.get("correlation", lambda df: CoMoments.from_frame(df).corr())
+
+    def column_profiles(self, top_n=10):
+        return self.get(("column_profiles", top_n), lambda df: profile_columns(df, top_n=top_n))
+
+    def constant_columns(self):
+        return self.get("constant_columns", constant_columns)
+
+    def type_map(self):
+        """Inferred kind of every column (see type_inference.infer_types)."""
+        return self.get("type_map", infer_types)
+
+    def digest(self, token_budget=1500):
+        return self.get(("digest", token_budget), lambda df: build_digest(df, token_budget, context=self))
+
+
+def context_for(df):
+    """Return the AnalysisContext shared by every caller working on this DataFrame."""
+    key = id(df)
+    with _contexts_lock:
+        context = _contexts.get(key)
+        if context is None or context._ref() is not df:
+            context = AnalysisContext(df)
+            _contexts[key] = context
+            weakref.finalize(df, _contexts.pop, key, None)
+        return context
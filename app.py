@@ -7,6 +7,18 @@ import numpy as np
 import seaborn as sns
 from dataset_manager import DatasetManager
 from main import CoreModel
+from llm_backends import make_backend
+from streaming_ingest import ChunkedSource
+from moments import Moments
+from quantile_sketch import merge_sketches, sketch_quantiles
+from cardinality_sketch import constant_columns
+from comoments import CoMoments
+from chunk_executor import ChunkExecutor, summarize_chunk
+from density_bins import density_grid, DENSITY_THRESHOLD
+from sampling import sample_source
+from plot_service import PlotService
+from analysis_context import context_for
+from type_inference import infer_types, apply_types
 from scipy import stats
 from sklearn.decomposition import PCA
 import mlflow
@@ -29,12 +41,25 @@ mlflow.set_experiment("LLM_Data_Analysis")
 st.sidebar.write(f"MLflow tracking directory: {tracking_uri}")
 
 # Initialize DatasetManager and CoreModel
-manager = DatasetManager()
+@st.cache_resource
+def plot_service():
+    # One service per server process, so its worker pool and figure cache survive reruns
+    return PlotService(os.path.join("datasets", ".plot_cache"))
+
+
+manager = DatasetManager(plot_service=plot_service())
 api_key = os.getenv("OPENAI_API_KEY")
-if not api_key:
+# CORE_MODEL_BACKEND selects the LLM backend: "openai" (default), "stub" for offline
+# load tests, or the base URL of a local OpenAI-compatible server
+backend_spec = os.getenv("CORE_MODEL_BACKEND", "openai")
+if not api_key and backend_spec == "openai":
     st.error("OpenAI API Key is not set in environment variables.")
     st.stop()
-core_model = CoreModel(api_key)
+# Bypass switch for the on-disk LLM response cache
+use_llm_cache = st.sidebar.checkbox("Reuse cached LLM responses", value=True)
+core_model = CoreModel(api_key, use_cache=use_llm_cache, backend=make_backend(backend_spec, api_key))
+if backend_spec != "openai":
+    st.sidebar.info(f"LLM backend: {backend_spec}")
 
 # MLflow UI Access (Always visible)
 st.sidebar.subheader("MLflow Tracking & Visualization")
@@ -88,24 +113,18 @@ uploaded_file = st.file_uploader("Upload your dataset (CSV, JSON, or Excel)", ty
 
 # Function to load data
 def load_data(file, chunk_size=None):
-    """Load data from uploaded file with optional chunking."""
+    """Load data from uploaded file, or stream it as a ChunkedSource when chunk_size is given."""
     file_type = file.name.split('.')[-1].lower()
     try:
-        if file_type == 'csv':
-            if chunk_size:
-                # Read in chunks for large CSV files
-                chunks = []
-                for chunk in pd.read_csv(file, chunksize=chunk_size):
-                    chunks.append(chunk)
-                return pd.concat(chunks, ignore_index=True)
-            return pd.read_csv(file)
-        elif file_type == 'xlsx' or file_type == 'xls':
-            return pd.read_excel(file)
-        elif file_type == 'json':
-            return pd.read_json(file)
-        else:
+        if chunk_size:
+            source = ChunkedSource(file, chunksize=chunk_size, file_type=file_type)
+            source.schema  # Infer now so format errors surface here
+            return source
+        if file_type not in ('csv', 'xlsx', 'xls', 'json'):
             st.error(f"Unsupported file type: {file_type}")
             return None
+        # Reruns with the same upload are served from the columnar cache instead of re-parsing
+        return manager.columnar_cache.load(file, lambda f: manager.read_file(f, file_type), variant=file_type)
     except Exception as e:
         st.error(f"Error loading file: {str(e)}")
         return None
@@ -143,8 +162,11 @@ if uploaded_file:
         data_timer = track_time("Data Loading")
         with st.spinner('Loading data...'):
             if CHUNK_SIZE:
-                df = load_data(uploaded_file, CHUNK_SIZE)
-                st.info(f"Processing first {CHUNK_SIZE:,} rows due to large file size")
+                source = load_data(uploaded_file, CHUNK_SIZE)
+                # A seeded uniform sample of the whole file, drawn in one streaming pass, not its first rows
+                df = sample_source(source, CHUNK_SIZE, seed=0) if source is not None else None
+                st.info(f"Interactive sections use a random sample of {CHUNK_SIZE:,} rows; "
+                        "summary statistics stream over the full file")
             else:
                 df = load_data(uploaded_file)
 
@@ -178,8 +200,7 @@ if uploaded_file:
                 df_cleaned['Date'] = pd.to_datetime(df_cleaned['Date'], errors='coerce')
 
             # 🔹 Detect constant columns (like 'Currency'), but do not drop them
-            nunique = df_cleaned.nunique(dropna=False)
-            constant_cols = nunique[nunique == 1].index.tolist()
+            constant_cols = constant_columns(df_cleaned)
             # Do not drop constant columns, just detect them
             # if constant_cols:
             #     st.info(f"Dropped constant columns: {', '.join(constant_cols)}")
@@ -202,39 +223,27 @@ if uploaded_file:
         df = clean_and_validate_data(df)
         cleaning_timer()
 
-        # Force conversion of all columns that look numeric to numeric dtype, but skip datetime columns
-        # Only force numeric conversion on columns that are likely numeric (object columns that look like numbers)
-        for col in df.columns:
-            if not pd.api.types.is_datetime64_any_dtype(df[col]):
-                # Only convert if all non-null values look like numbers
-                non_null = df[col].dropna()
-                if not non_null.empty and non_null.apply(lambda x: isinstance(x, (int, float)) or (isinstance(x, str) and x.replace('.', '', 1).isdigit())).all():
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
+        # Convert text columns whose values are all numbers; the type map is reused for time-series detection
+        type_map = infer_types(df)
+        df, type_map = apply_types(df, type_map, kinds=("numeric_text",))
 
         # Handle NaT in datetime columns by dropping rows with NaT
         for col in df.columns:
             if pd.api.types.is_datetime64_any_dtype(df[col]):
                 df = df[df[col].notna()]
 
-        # Use robust datetime serialization for all .to_json() calls
+        # The frame is final from here on: derived statistics are computed once and shared
+        context = context_for(df)
+
         # Get LLM feedback on data quality
-        # Patch constant object-type columns that may be misrepresented by Pandas as having count=0
-        desc = df.describe(include='all')
+        # Report constant columns explicitly, including ones that are entirely null
         profile_constant_cols = {}
-        for col in df.columns:
-            if df[col].nunique(dropna=False) == 1:
-                non_nulls = df[col].dropna()
-                if not non_nulls.empty:
-                    value = non_nulls.iloc[0]
-                    desc.loc['count', col] = df.shape[0]
-                    desc.loc['unique', col] = 1
-                    desc.loc['top', col] = value
-                    desc.loc['freq', col] = df.shape[0]
-                    profile_constant_cols[col] = value
-                else:
-                    profile_constant_cols[col] = None
+        for col in context.constant_columns():
+            non_nulls = df[col].dropna()
+            profile_constant_cols[col] = non_nulls.iloc[0] if not non_nulls.empty else None
 
-        stats_json = desc.to_json(date_format='iso')
+        # Every prompt gets the same token-budgeted digest instead of raw describe()/row dumps
+        dataset_digest = context.digest(core_model.digest_token_budget)
         validation_prompt = f"""
 You are a data quality expert analyzing diverse datasets. Provide general observations about:
 
@@ -249,18 +258,87 @@ For constant columns, suggest whether they should be:
 - Dropped (if truly redundant)
 
 Dataset statistics:
-{stats_json}
+{dataset_digest}
 
 Constant columns detected:
-{json.dumps(profile_constant_cols)}
+{json.dumps(profile_constant_cols, default=str)}
+"""
+
+        llm_prompt = f"""
+You're a senior data analyst. Analyze this dataset completely:
+- Describe all numerical and categorical fields
+- Detect any issues: outliers, skewness, anomalies
+- Summarize key statistics and trends
+- Recommend feature engineering ideas
+- Propose machine learning or modeling strategies
+
+Here is a compact digest (schema, statistics, correlations and representative rows) in JSON:
+{dataset_digest}
 """
-        validation_feedback = core_model.generate_insights(validation_prompt)
+        # Use LLM to suggest the best analysis flow for the dataset
+        flow_prompt = f"""
+        Given the following dataset schema and statistics, suggest an optimal analysis flow. 
+        The flow should include: 
+        - Data type checks
+        - Outlier detection (if numeric columns exist)
+        - Correlation analysis (if multiple numeric columns)
+        - Time series analysis (if datetime columns)
+        - Feature engineering (if categorical columns)
+        - Any other relevant steps for this data
+        
+        Dataset schema and statistics: {dataset_digest}
+        """
+        cat_cols = df.select_dtypes(include=["object", "category"]).columns
+        # Ask LLM which columns are significant for analysis
+        null_counts = context.null_counts()
+        columns_info = [{"name": col, "dtype": str(df[col].dtype), "n_missing": int(null_counts[col])} for col in df.columns]
+        llm_col_prompt = (
+            "Given the following columns with their types and missing value counts, "
+            "which columns should be included in meaningful data analysis? "
+            "Return a Python list of column names to keep.\n"
+            f"Columns: {columns_info}"
+        )
+
+        # None of these prompts depend on each other, so send them concurrently in the
+        # background while the first sections below stream their answers token by token
+        insight_prompts = {
+            "recommendations": "Based on this dataset, provide actionable recommendations for further analysis, feature engineering, or modeling.",
+            "statistical_foundations": (
+                "Explain the meaning of mean, median, mode, variance, standard deviation, skewness, and kurtosis in the context of this dataset: " 
+                + dataset_digest
+            ),
+            "analysis_flow": flow_prompt,
+            "significant_columns": llm_col_prompt
+        }
+        if len(cat_cols) > 0:
+            insight_prompts["feature_engineering"] = f"Suggest feature engineering steps for these categorical columns: {list(cat_cols)}"
+        # The short summary sections share the same dataset context, so they go out as one packed request
+        summary_questions = {
+            "preprocessing": "Suggest preprocessing steps for this dataset, including missing value imputation and encoding, but do not provide code snippets.",
+            "statistical_techniques": "Summarize key statistical techniques relevant to this dataset in 2-3 sentences, focusing on actionable insights only.",
+            "ml_basics": "Briefly summarize the most relevant machine learning approaches for this dataset and their practical use, in 2-3 sentences.",
+            "visualization": "Recommend the most effective visualizations for this dataset and what insights they can reveal, in 2-3 sentences.",
+            "advanced_topics": "Briefly mention any advanced analysis or modeling techniques that could be valuable for this dataset, in 2-3 sentences.",
+            "tools": "Summarize how LLMs and automated tools are used in this analysis, focusing on practical benefits for analysts, in 2-3 sentences.",
+            "ethics": "How to detect bias, ensure fairness, and maintain privacy in data analysis?"
+        }
+        llm_calls = {name: core_model.agenerate_insights(prompt) for name, prompt in insight_prompts.items()}
+        llm_calls["feature_importance"] = core_model.aexplain_feature_importance(df)
+        llm_calls["summary_sections"] = core_model.agenerate_sections(summary_questions, dataset_digest)
+
+        from concurrent.futures import ThreadPoolExecutor
+        llm_timer = track_time("LLM Insights (background)")
+        llm_executor = ThreadPoolExecutor(max_workers=1)
+        llm_future = llm_executor.submit(core_model.run_batch, llm_calls)
+        llm_future.add_done_callback(lambda _: llm_timer())
+        llm_executor.shutdown(wait=False)
+
         st.subheader("Data Quality Analysis")
-        st.write(validation_feedback)
+        validation_feedback = st.write_stream(core_model.generate_insights(validation_prompt, stream=True))
 
         # Display cleaned statistics
         st.subheader("Basic Statistics")
-        stats_display = df.describe()
+        stats_display = context.describe()
         
         # Format display of statistics
         def format_stats(stats_df):
@@ -279,54 +357,63 @@ Constant columns detected:
         st.write(format_stats(stats_display))
 
         # Get LLM insights on the statistics
-        stats_insights = core_model.generate_insights(f"Analyze these statistics and provide key insights: {df.describe().to_json(date_format='iso')}")
         st.write("Statistical Insights:")
-        st.write(stats_insights)
+        stats_insights = st.write_stream(core_model.generate_insights(
+            f"Analyze these statistics and provide key insights: {dataset_digest}", stream=True
+        ))
 
-        # Process data in parallel for large files
+        # Stream the full file in chunks for large files
         if file_size > 100:
-            from concurrent.futures import ThreadPoolExecutor
-            import numpy as np
-            
-            def process_chunk(chunk_df):
-                stats_df = chunk_df.describe()
-                corr_df = chunk_df.select_dtypes(include=[np.number]).corr() if len(chunk_df.columns) > 1 else None
-                ts_analysis = core_model.perform_time_series_analysis(chunk_df)
-                return {
-                    'stats': stats_df,
-                    'correlation': corr_df,
-                    'time_series': ts_analysis
-                }
-
-            chunks = np.array_split(df, max(1, len(df) // CHUNK_SIZE))
+            # Chunks go to worker processes through shared memory; threads when there is only one CPU.
+            # Only a few chunks are in flight so memory stays bounded by the window, not the file
+            chunk_executor = ChunkExecutor(
+                max_in_flight=4, mode="process" if (os.cpu_count() or 1) > 1 else "thread"
+            )
             parallel_timer = track_time("Parallel Processing")
-            with ThreadPoolExecutor() as executor:
-                results = list(executor.map(process_chunk, chunks))
+            # Fold each chunk's moments, sketches, co-moments and per-period partials into running
+            # totals as it arrives, so memory stays bounded by the window, not the number of chunks
+            moments, comoments, quartile_sketches, ts_partials = Moments(), CoMoments(), {}, {}
+            for result in chunk_executor.map(summarize_chunk, source):
+                moments = moments.merge(result['moments'])
+                comoments = comoments.merge(result['comoments'])
+                quartile_sketches = merge_sketches([quartile_sketches, result['sketches']])
+                for date_col, partials in result['ts_partials'].items():
+                    ts_partials[date_col] = core_model.timeseries_engine.merge_partials(
+                        [ts_partials.get(date_col), partials]
+                    )
             parallel_timer()
+            if source.widened:
+                st.warning("Later rows did not fit the types inferred from the start of the file; "
+                           f"these columns were widened to keep every value: {source.widened}")
+            if source.coerced:
+                st.warning(f"Values that could not be represented and became missing: {source.coerced}")
 
             # Combine results
-            stats = pd.concat([r['stats'] for r in results]).groupby(level=0).mean()
-            correlations = [r['correlation'] for r in results if r['correlation'] is not None]
-            correlation = pd.concat(correlations).groupby(level=0).mean() if correlations else None
-            
-            # Combine time series analysis
+            stats = moments.describe()
+            # Quartiles over the full file from merged sketches, since chunks cannot be sorted together
+            quartiles, _ = sketch_quantiles(quartile_sketches, [0.25, 0.5, 0.75])
+            stats = pd.concat([stats, quartiles.rename(index=lambda q: f"{q:.0%}")])
+            # Exact full-file correlation from merged co-moments, not an average of chunk matrices
+            correlation = comoments.corr()
+
+            # Decompose each date column once from its merged partials
             ts_results = {}
-            for r in results:
-                if r['time_series']:
-                    for key, value in r['time_series'].items():
-                        if key not in ts_results:
-                            ts_results[key] = value
-                        else:
-                            # Merge time series results
-                            for metric in ['trend', 'seasonal', 'resid']:
-                                ts_results[key][metric].extend(value[metric])
+            for date_col, partials in ts_partials.items():
+                ts_results.update(core_model.timeseries_engine.decompose_partials(partials, date_col))
         else:
+            quartile_sketches = None
             analysis_timer = track_time("Analysis")
-            stats = df.describe()
-            correlation = df.select_dtypes(include=[np.number]).corr()
-            ts_results = core_model.perform_time_series_analysis(df)
+            stats = context.describe()
+            correlation = core_model.generate_correlation_matrix(df)
+            ts_results = core_model.perform_time_series_analysis(df, type_map)
             analysis_timer()
 
+        def correlation_for(cols):
+            # Reuse the matrix computed above instead of another full corr() pass
+            if correlation is not None and set(cols) <= set(correlation.columns):
+                return correlation.loc[cols, cols]
+            return core_model.generate_correlation_matrix(df[cols])
+
         # Display timing information
         st.subheader("Processing Times")
         for step, duration in processing_times.items():
@@ -334,7 +421,7 @@ Constant columns detected:
 
         # Generate Dataset Profile
         st.subheader("Dataset Profile")
-        profile = manager.profile_dataset(df, "temp")
+        profile = manager.profile_dataset(df, "temp", core_model=core_model)
 
         # --- Flag all-null and constant columns in Streamlit, do NOT drop them ---
         all_null_cols = profile.get("all_null_columns", [])
@@ -362,10 +449,11 @@ Constant columns detected:
         # Use only a sample for visualizations if dataset is large
         VIS_SAMPLE_SIZE = 1000
         MAX_VIS_COLS = 5
-        vis_df = df.copy()
+        vis_df = df
         if len(vis_df) > VIS_SAMPLE_SIZE:
-            vis_df = vis_df.head(VIS_SAMPLE_SIZE)
-            st.info(f"Visualizations use only the first {VIS_SAMPLE_SIZE} rows for speed.")
+            vis_df = sample_source(df, VIS_SAMPLE_SIZE, seed=0)
+            st.info(f"The heatmap uses a random sample of {VIS_SAMPLE_SIZE} rows for speed; "
+                    "the pairplot bins every row.")
         # Always recompute num_cols from the latest df
         num_cols = vis_df.select_dtypes(include=[np.number]).columns.tolist()
         if len(num_cols) > MAX_VIS_COLS:
@@ -374,30 +462,29 @@ Constant columns detected:
         else:
             vis_cols = num_cols
 
-        @st.cache_data(show_spinner=False)
-        def fast_pairplot(data, cols):
-            import seaborn as sns
-            import matplotlib.pyplot as plt
-            pairplot_fig = sns.pairplot(data[cols])
-            return pairplot_fig.fig
-
-        @st.cache_data(show_spinner=False)
-        def fast_corr_heatmap(data, cols):
-            import matplotlib.pyplot as plt
-            import seaborn as sns
-            fig, ax = plt.subplots(figsize=(8, 6))
-            sns.heatmap(data[cols].corr(), annot=True, cmap='coolwarm', ax=ax)
-            return fig
-
         # Generate Plots (FAST)
         st.subheader("Visualizations (Fast Mode)")
         if len(vis_cols) >= 2:
             st.write("Pairplot:")
-            fig = fast_pairplot(vis_df, vis_cols)
-            st.pyplot(fig)
+            # Large data is drawn from binned counts, so render cost does not grow with rows
+            grid = None
+            if CHUNK_SIZE:
+                # Bin every row of the file, reusing the streamed min/max as bin ranges; columns without
+                # streamed stats (e.g. numbers stored as text) get theirs from an extra pass
+                grid = density_grid(source, vis_cols, ranges={
+                    col: (stats.at['min', col], stats.at['max', col])
+                    for col in vis_cols if col in stats.columns and pd.notna(stats.at['min', col])
+                })
+            elif len(df) > DENSITY_THRESHOLD:
+                grid = density_grid(df, vis_cols)
+            if grid is not None:
+                st.image(manager.plot_service.render("density_pairplot", grid))
+                if grid.skipped:
+                    st.info(f"Columns with no numeric values were left out of the pairplot: {grid.skipped}")
+            else:
+                st.image(manager.plot_service.render("pairplot", df[vis_cols]))
             st.write("Correlation Heatmap:")
-            fig = fast_corr_heatmap(vis_df, vis_cols)
-            st.pyplot(fig)
+            st.image(manager.plot_service.render("heatmap", vis_df[vis_cols].corr(), {"figsize": (8, 6)}))
         elif len(vis_cols) == 1:
             st.info("Only one numeric column found. Skipping pairplot and heatmap (need at least 2 numeric columns).")
         else:
@@ -414,30 +501,14 @@ Constant columns detected:
         # Generate Insights
         st.subheader("LLM-Generated Insights")
         core_model.api_key = api_key  # Update API key
-        # Avoid sending the full DataFrame to the LLM to prevent token limit errors
-        # Replace NaT with None for JSON serialization
-        df_for_json = df.copy()
-        for col in df_for_json.columns:
-            if pd.api.types.is_datetime64_any_dtype(df_for_json[col]):
-                df_for_json[col] = df_for_json[col].where(df_for_json[col].notna(), None)
-        sample_json = df_for_json.head(20).to_json(date_format='iso')
-        llm_prompt = f"""
-You're a senior data analyst. Analyze this dataset completely:
-- Describe all numerical and categorical fields
-- Detect any issues: outliers, skewness, anomalies
-- Summarize key statistics and trends
-- Recommend feature engineering ideas
-- Propose machine learning or modeling strategies
+        insights = st.write_stream(core_model.generate_insights(llm_prompt, stream=True))
 
-Here is a sample (first 20 rows) in JSON:
-{sample_json}
-"""
-        insights = core_model.generate_insights(llm_prompt)
-        st.write(insights)
+        # Remaining sections read the answers fetched in the background
+        with st.spinner('Waiting for remaining LLM insights...'):
+            llm_results = llm_future.result()
 
         # Generate Recommendations
-        recommendations_prompt = "Based on this dataset, provide actionable recommendations for further analysis, feature engineering, or modeling."
-        recommendations = core_model.generate_insights(recommendations_prompt)
+        recommendations = llm_results["recommendations"]
         st.subheader("LLM-Generated Recommendations")
         st.write(recommendations)
 
@@ -445,7 +516,7 @@ Here is a sample (first 20 rows) in JSON:
         st.subheader("Distribution Graphs")
         distribution_plots = manager.generate_distribution_plots(df, "temp/plots")
         for column, plot_path in distribution_plots.items():
-            st.image(plot_path, caption=f"Distribution of {column}")
+            st.image(manager.plot_service.image(plot_path), caption=f"Distribution of {column}")
             skewness = manager.calculate_skewness(df[column])
             if skewness > 0:
                 st.write(f"The data for {column} is positively skewed.")
@@ -469,8 +540,7 @@ Here is a sample (first 20 rows) in JSON:
 
         # Interactive Relationship Explanation
         st.subheader("Interactive Relationship Explanation")
-        # Always recompute num_cols from the latest df
-        num_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+        num_cols = context.numeric_columns()
         st.write("Detected numeric columns:", num_cols)  # Debug info for user
         # Only allow numeric columns for relationship analysis
         if len(num_cols) < 2:
@@ -481,38 +551,36 @@ Here is a sample (first 20 rows) in JSON:
             if len(selected_features) >= 2:
                 st.write("Scatter Plot:")
                 scatter_plot_path = manager.generate_scatter_plot(df, selected_features, "temp/plots")
-                st.image(scatter_plot_path, caption="Scatter Plot")
+                st.image(manager.plot_service.image(scatter_plot_path), caption="Scatter Plot")
 
                 st.write("Correlation Heatmap:")
                 correlation_heatmap_path = manager.generate_correlation_heatmap(df[selected_features], "temp/plots")
-                st.image(correlation_heatmap_path, caption="Correlation Heatmap")
+                st.image(manager.plot_service.image(correlation_heatmap_path), caption="Correlation Heatmap")
 
                 st.write("LLM-Generated Insights:")
-                # Avoid sending the full DataFrame to the LLM to prevent token limit errors
-                rel_sample_json = df[selected_features].head(20).to_json(date_format='iso')
-                relationship_insights = core_model.generate_relationship_insights(rel_sample_json)
-                st.write(relationship_insights)
+                # CoreModel digests the DataFrame to stay within the prompt token budget
+                relationship_insights = st.write_stream(
+                    core_model.generate_relationship_insights(df[selected_features], stream=True)
+                )
 
                 # Correlation Matrix
                 st.subheader("Correlation Matrix")
-                correlation_matrix = core_model.generate_correlation_matrix(df[selected_features])
+                correlation_matrix = correlation_for(selected_features)
                 st.write(correlation_matrix)
 
         # Correlation Matrix (filtering non-numeric columns)
         st.subheader("Correlation Matrix")
         # Only include numeric columns to avoid conversion errors
-        num_cols_corr = df.select_dtypes(include=[np.number]).columns.tolist()
+        num_cols_corr = context.numeric_columns()
         if num_cols_corr:
-            corr_mat = core_model.generate_correlation_matrix(df[num_cols_corr])
+            corr_mat = correlation_for(num_cols_corr)
             st.write(corr_mat)
         else:
             st.info("No numeric columns available for correlation matrix.")
 
         # Feature Importance Explanation
         st.subheader("Feature Importance Explanation")
-        # Avoid sending the full DataFrame to the LLM to prevent token limit errors
-        feat_sample_json = df.head(20).to_json(date_format='iso')
-        feature_importance_insights = core_model.explain_feature_importance(feat_sample_json)
+        feature_importance_insights = llm_results["feature_importance"]
         st.write(feature_importance_insights)
 
         # Save Results
@@ -535,19 +603,16 @@ Here is a sample (first 20 rows) in JSON:
         # 1. Statistical Foundations
         st.header("Statistical Foundations")
         st.subheader("Descriptive Statistics")
-        st.write(df.describe(include='all').T)
-        st.write("Skewness:", df.select_dtypes(include=[np.number]).skew())
-        st.write("Kurtosis:", df.select_dtypes(include=[np.number]).kurt())
+        st.write(context.describe(include='all').T)
+        st.write("Skewness:", context.moments().loc["skew"])
+        st.write("Kurtosis:", context.moments().loc["kurt"])
         st.write("LLM Explanation:")
-        st.write(core_model.generate_insights(
-            "Explain the meaning of mean, median, mode, variance, standard deviation, skewness, and kurtosis in the context of this dataset: " 
-            + df.describe(include='all').T.to_json(date_format='iso')
-        ))
+        st.write(llm_results["statistical_foundations"])
 
         # --- Additional Mathematical & Statistical Analyses ---
         st.header("Mathematical & Statistical Analyses")
         # Focus on numeric features for advanced metrics
-        num_cols_ms = df.select_dtypes(include=[np.number]).columns.tolist()
+        num_cols_ms = context.numeric_columns()
         if num_cols_ms:
             # PCA for dimensionality reduction
             from sklearn.decomposition import PCA
@@ -591,93 +656,87 @@ Here is a sample (first 20 rows) in JSON:
         
         # --- LLM-Driven Analysis Flow Selection ---
         st.subheader("Automated Data Analysis Flow")
-        # Use LLM to suggest the best analysis flow for the dataset
-        flow_prompt = f"""
-        Given the following dataset schema and statistics, suggest an optimal analysis flow. 
-        The flow should include: 
-        - Data type checks
-        - Outlier detection (if numeric columns exist)
-        - Correlation analysis (if multiple numeric columns)
-        - Time series analysis (if datetime columns)
-        - Feature engineering (if categorical columns)
-        - Any other relevant steps for this data
-        
-        Dataset schema: {str(df.dtypes)}
-        Statistics: {df.describe(include='all').T.to_json(date_format='iso')}
-        """
-        flow_suggestion = core_model.generate_insights(flow_prompt)
+        flow_suggestion = llm_results["analysis_flow"]
         st.write("LLM-Suggested Analysis Flow:")
         st.write(flow_suggestion)
 
         # --- Execute LLM-Driven Flow ---
         # Outlier Detection (if numeric columns)
-        numeric_cols = df.select_dtypes(include=[np.number]).columns
+        numeric_cols = context.numeric_columns()
         outlier_results = None
         if len(numeric_cols) > 0:
-            Q1 = df[numeric_cols].quantile(0.25)
-            Q3 = df[numeric_cols].quantile(0.75)
+            if quartile_sketches:
+                # Fences from the full file, applied to the rows held in memory
+                quartiles, rank_errors = sketch_quantiles(
+                    {col: quartile_sketches[col] for col in numeric_cols if col in quartile_sketches}, [0.25, 0.75]
+                )
+            else:
+                # Shared with the LLM digest through the analysis context
+                quartiles, rank_errors = context.quartiles()
+            Q1 = quartiles.loc[0.25].reindex(numeric_cols)
+            Q3 = quartiles.loc[0.75].reindex(numeric_cols)
             IQR = Q3 - Q1
             outliers = ((df[numeric_cols] < (Q1 - 1.5 * IQR)) | (df[numeric_cols] > (Q3 + 1.5 * IQR))).sum()
             outlier_results = outliers
             st.subheader("Outlier Detection (IQR Method)")
             st.write("Outliers detected per numeric column:")
             st.write(outliers)
+            max_rank_error = max(rank_errors.values(), default=0.0)
+            if max_rank_error:
+                st.write(f"Quartiles are approximate: within ±{max_rank_error:.2%} of the exact rank.")
 
         # Correlation Analysis (if multiple numeric columns)
         if len(numeric_cols) > 1:
             st.subheader("Correlation Analysis")
-            corr = df[numeric_cols].corr()
+            corr = correlation_for(list(numeric_cols))
             st.write(corr)
 
         # Time Series Analysis (if datetime columns)
         datetime_cols = df.select_dtypes(include=["datetime", "datetime64[ns]"]).columns
         if len(datetime_cols) > 0:
             st.subheader("Time Series Analysis")
-            ts_results = core_model.perform_time_series_analysis(df)
+            ts_results = core_model.perform_time_series_analysis(df, type_map)
             if ts_results:
                 for key, analysis in ts_results.items():
                     st.write(f"Analysis for {key}:")
-                    st.write("Trend:", analysis['trend'][:10])
+                    # Trend and residuals are undefined for half a period at each end
+                    st.write("Trend:", analysis['trend'][~np.isnan(analysis['trend'])][:10])
                     st.write("Seasonal:", analysis['seasonal'][:10])
-                    st.write("Residuals:", analysis['resid'][:10])
+                    st.write("Residuals:", analysis['resid'][~np.isnan(analysis['resid'])][:10])
 
         # Feature Engineering (if categorical columns)
-        cat_cols = df.select_dtypes(include=["object", "category"]).columns
         if len(cat_cols) > 0:
             st.subheader("Feature Engineering Suggestions")
-            feat_prompt = f"Suggest feature engineering steps for these categorical columns: {list(cat_cols)}"
-            feat_suggestions = core_model.generate_insights(feat_prompt)
-            st.write(feat_suggestions)
+            st.write(llm_results["feature_engineering"])
 
         # 3. Data Preprocessing
         st.header("Data Preprocessing")
         # Use LLM to suggest preprocessing steps, but do not show code
-        preprocessing_suggestion = core_model.generate_insights("Suggest preprocessing steps for this dataset, including missing value imputation and encoding, but do not provide code snippets.")
-        st.write(preprocessing_suggestion)
+        st.write(llm_results["summary_sections"]["preprocessing"])
 
         # 4. Statistical Techniques
         st.header("Statistical Techniques")
-        st.write(core_model.generate_insights("Summarize key statistical techniques relevant to this dataset in 2-3 sentences, focusing on actionable insights only."))
+        st.write(llm_results["summary_sections"]["statistical_techniques"])
 
         # 5. Machine Learning Basics
         st.header("Machine Learning Basics")
-        st.write(core_model.generate_insights("Briefly summarize the most relevant machine learning approaches for this dataset and their practical use, in 2-3 sentences."))
+        st.write(llm_results["summary_sections"]["ml_basics"])
 
         # 6. Data Visualization
         st.header("Data Visualization")
-        st.write(core_model.generate_insights("Recommend the most effective visualizations for this dataset and what insights they can reveal, in 2-3 sentences."))
+        st.write(llm_results["summary_sections"]["visualization"])
 
         # 7. Advanced Topics
         st.header("Advanced Topics")
-        st.write(core_model.generate_insights("Briefly mention any advanced analysis or modeling techniques that could be valuable for this dataset, in 2-3 sentences."))
+        st.write(llm_results["summary_sections"]["advanced_topics"])
 
         # 8. Tools & LLM Integration
         st.header("Tools & LLM Integration")
-        st.write(core_model.generate_insights("Summarize how LLMs and automated tools are used in this analysis, focusing on practical benefits for analysts, in 2-3 sentences."))
+        st.write(llm_results["summary_sections"]["tools"])
 
         # 9. Ethics & Best Practices
         st.header("Ethics & Best Practices")
-        st.write(core_model.generate_insights("How to detect bias, ensure fairness, and maintain privacy in data analysis?"))
+        st.write(llm_results["summary_sections"]["ethics"])
 
     except Exception as e:
         st.error(f"An error occurred while processing the file: {e}")
@@ -689,18 +748,11 @@ Here is a sample (first 20 rows) in JSON:
     st.write("Column Names and Types:")
     st.write(pd.DataFrame({"Column": df.columns, "Type": [str(df[col].dtype) for col in df.columns]}))
     st.write("Missing values per column:")
-    st.write(df.isnull().sum())
-
-    # Ask LLM which columns are significant for analysis
-    columns_info = [{"name": col, "dtype": str(df[col].dtype), "n_missing": int(df[col].isnull().sum())} for col in df.columns]
-    llm_col_prompt = (
-        "Given the following columns with their types and missing value counts, "
-        "which columns should be included in meaningful data analysis? "
-        "Return a Python list of column names to keep.\n"
-        f"Columns: {columns_info}"
-    )
+    st.write(context_for(df).null_counts())
+
+    # LLM suggestion of significant columns was fetched with the other prompts
     try:
-        significant_cols_str = core_model.generate_insights(llm_col_prompt)
+        significant_cols_str = llm_results["significant_columns"]
         import ast
         significant_cols = ast.literal_eval(significant_cols_str)
         if not isinstance(significant_cols, list):
@@ -786,6 +838,9 @@ Here is a sample (first 20 rows) in JSON:
             mean_corr = correlation.abs().mean().mean()
             mlflow.log_metric("mean_correlation", mean_corr)
             st.write("[DEBUG] Mean correlation metric logged to MLflow.")
+        cache_stats = core_model.cache.stats()
+        mlflow.log_metrics({"llm_cache_hits": cache_stats["hits"], "llm_cache_misses": cache_stats["misses"]})
+        st.write(f"[DEBUG] LLM cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses.")
     finally:
         mlflow.end_run()
         st.write("[DEBUG] MLflow run ended.")
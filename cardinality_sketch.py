@@ -0,0 +1,185 @@
+import numpy as np
+import pandas as pd
+
+# Above this many rows, profiles use sketches instead of exact hash tables
+SKETCH_THRESHOLD = 1_000_000
+# Sketches are fed in slices of this many rows, so no full-column hash table is ever built
+SLICE_ROWS = 100_000
+# Columns whose sampled distinct ratio is at most this have small exact hash tables, so stay exact
+LOW_CARDINALITY_RATIO = 0.05
+
+
+def _hash(series):
+    """64-bit hashes of a Series' non-null values (stable across chunks with the same dtype)."""
+    # categorize=False hashes values directly instead of factorizing the column first (same hashes)
+    return pd.util.hash_pandas_object(series.dropna(), index=False, categorize=False).to_numpy(dtype="uint64")
+
+
+def _bit_length(values):
+    # Exact bit length of uint64 values, via two exactly representable 32-bit halves
+    high = (values >> np.uint64(32)).astype("float64")
+    low = (values & np.uint64(0xFFFFFFFF)).astype("float64")
+    high_bits = np.frexp(high)[1]
+    return np.where(high > 0, 32 + high_bits, np.frexp(low)[1])
+
+
+class HyperLogLog:
+    """HyperLogLog distinct counter with 2**p one-byte registers (relative error ~1.04 / sqrt(2**p))."""
+
+    def __init__(self, p=14):
+        self.p = p
+        self.registers = np.zeros(2 ** p, dtype="uint8")
+
+    def update_hashes(self, hashes):
+        index = (hashes >> np.uint64(64 - self.p)).astype("int64")
+        remainder = hashes << np.uint64(self.p)
+        # Position of the first set bit after the index bits; all-zero remainders get the maximum
+        rank = np.minimum(64 - _bit_length(remainder) + 1, 64 - self.p + 1).astype("uint8")
+        np.maximum.at(self.registers, index, rank)
+        return self
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def relative_error(self):
+        return 1.04 / np.sqrt(len(self.registers))
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(2.0 ** -self.registers.astype("float64"))
+        empty = np.count_nonzero(self.registers == 0)
+        if estimate <= 2.5 * m and empty:
+            # Linear counting is more accurate for small cardinalities
+            estimate = m * np.log(m / empty)
+        return int(round(estimate))
+
+
+class HeavyHitters:
+    """Misra-Gries frequent-item summary with at most `k` counters, mergeable across chunks.
+
+    Reported counts are lower bounds; each true count is at most `error` higher.
+    """
+
+    def __init__(self, k=20):
+        self.k = k
+        self.counts = pd.Series(dtype="int64")
+        self.error = 0
+
+    def update_counts(self, counts):
+        combined = self.counts.add(counts, fill_value=0).astype("int64")
+        if len(combined) > self.k:
+            combined = combined.sort_values(ascending=False)
+            threshold = int(combined.iloc[self.k])
+            combined = combined.iloc[:self.k] - threshold
+            combined = combined[combined > 0]
+            self.error += threshold
+        self.counts = combined
+        return self
+
+    def merge(self, other):
+        self.update_counts(other.counts)
+        self.error += other.error
+        return self
+
+    def top(self, n=None):
+        return self.counts.sort_values(ascending=False).head(n or self.k)
+
+
+class ColumnSketch:
+    """Distinct count, null count and top values for one column, in bounded memory."""
+
+    def __init__(self, k=20, p=14):
+        self.hll = HyperLogLog(p)
+        self.heavy = HeavyHitters(k)
+        self.rows = 0
+        self.nulls = 0
+
+    def update(self, series):
+        for start in range(0, len(series), SLICE_ROWS):
+            part = series.iloc[start:start + SLICE_ROWS]
+            self.rows += len(part)
+            self.nulls += int(part.isna().sum())
+            self.hll.update_hashes(_hash(part))
+            # Counts within one slice are exact; the summary keeps only the heaviest across slices
+            self.heavy.update_counts(part.value_counts())
+        return self
+
+    def merge(self, other):
+        self.hll.merge(other.hll)
+        self.heavy.merge(other.heavy)
+        self.rows += other.rows
+        self.nulls += other.nulls
+        return self
+
+    def summary(self, top_n=10):
+        non_null = self.rows - self.nulls
+        return {
+            # Count missing values as one more distinct value, like nunique(dropna=False)
+            "distinct": min(self.hll.count(), non_null) + (1 if self.nulls else 0),
+            "distinct_relative_error": float(self.hll.relative_error()),
+            "top_values": {str(value): int(count) for value, count in self.heavy.top(top_n).items()},
+            "top_count_error": int(self.heavy.error),
+        }
+
+
+def sketch_columns(df, sketches=None, k=20):
+    """Update (or create) a ColumnSketch per column of a chunk and return them."""
+    sketches = {} if sketches is None else sketches
+    for col in df.columns:
+        sketches.setdefault(col, ColumnSketch(k)).update(df[col])
+    return sketches
+
+
+def _exact_profile(series, top_n):
+    return {
+        "distinct": int(series.nunique(dropna=False)),
+        "distinct_relative_error": 0.0,
+        "top_values": {str(value): int(count) for value, count in series.value_counts().head(top_n).items()},
+        "top_count_error": 0,
+    }
+
+
+def _is_low_cardinality(series):
+    # Positions drawn with replacement: series.sample would permute the whole column to pick them
+    positions = np.sort(np.random.default_rng(0).integers(0, len(series), min(SLICE_ROWS, len(series))))
+    probe = series.iloc[positions]
+    return probe.nunique(dropna=False) <= LOW_CARDINALITY_RATIO * len(probe)
+
+
+def profile_columns(df, exact=None, top_n=10, threshold=SKETCH_THRESHOLD):
+    """Distinct counts and top values per column, exact where that is cheap and sketched otherwise.
+
+    `exact=None` profiles a column exactly up to `threshold` rows, or when a
+    sample shows few distinct values (its hash table stays small); only large,
+    high-cardinality columns are sketched. True or False forces the mode.
+    """
+    profiles = {}
+    for col in df.columns:
+        series = df[col]
+        column_exact = exact
+        if column_exact is None:
+            column_exact = len(series) <= threshold or _is_low_cardinality(series)
+        if column_exact:
+            profiles[col] = _exact_profile(series, top_n)
+        else:
+            profiles[col] = ColumnSketch(max(20, top_n)).update(series).summary(top_n)
+    return profiles
+
+
+def is_constant(series):
+    """Same as `series.nunique(dropna=False) == 1`, without building a hash table."""
+    if len(series) == 0:
+        return False
+    nulls = series.isna()
+    if nulls.all():
+        return True
+    if nulls.any():
+        return False
+    return bool((series == series.iloc[0]).all())
+
+
+def constant_columns(df):
+    """Columns holding a single value (or only missing values)."""
+    return [col for col in df.columns if is_constant(df[col])]
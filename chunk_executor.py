@@ -0,0 +1,143 @@
+import os
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from moments import Moments
+from comoments import CoMoments
+from quantile_sketch import sketch_frame
+from timeseries_engine import TimeSeriesEngine
+
+
+class SharedFrame:
+    """Numeric and datetime columns of a chunk, copied once into shared memory blocks.
+
+    The object itself is small and picklable: workers call `attach()` to get a
+    DataFrame whose columns are zero-copy views of the shared blocks. The
+    parent calls `release()` when the work is done.
+    """
+
+    def __init__(self, df):
+        self.blocks = []
+        self._segments = []
+        numeric = df.select_dtypes(include=[np.number])
+        dates = df.select_dtypes(include=["datetime64"])
+        for columns, values in (
+            (list(numeric.columns), numeric.to_numpy(dtype="float64", na_value=np.nan)),
+            (list(dates.columns), dates.to_numpy(dtype="datetime64[ns]")),
+        ):
+            if not columns or not len(values):
+                continue
+            segment = shared_memory.SharedMemory(create=True, size=values.nbytes)
+            np.ndarray(values.shape, dtype=values.dtype, buffer=segment.buf)[:] = values
+            self._segments.append(segment)
+            self.blocks.append((segment.name, values.shape, values.dtype.str, columns))
+        self.index_start = int(df.index[0]) if isinstance(df.index, pd.RangeIndex) and len(df) else 0
+
+    def __getstate__(self):
+        # Only the block descriptions travel to workers, never the segments themselves
+        return {"blocks": self.blocks, "index_start": self.index_start, "_segments": []}
+
+    def attach(self):
+        """Return (DataFrame of views, segments); close the segments once the frame is no longer used."""
+        segments, parts = [], []
+        for name, shape, dtype, columns in self.blocks:
+            # Pool workers share the parent's resource tracker, so attaching does not take ownership
+            segment = shared_memory.SharedMemory(name=name)
+            segments.append(segment)
+            values = np.ndarray(shape, dtype=np.dtype(dtype), buffer=segment.buf)
+            parts.append(pd.DataFrame(values, columns=columns, copy=False))
+        df = pd.concat(parts, axis=1, copy=False) if len(parts) > 1 else (parts[0] if parts else pd.DataFrame())
+        df.index = pd.RangeIndex(self.index_start, self.index_start + len(df))
+        return df, segments
+
+    def release(self):
+        for segment in self._segments:
+            segment.close()
+            segment.unlink()
+        self._segments = []
+
+
+def summarize_chunk(df):
+    """Mergeable summaries of one chunk: moments, quantile sketches, co-moments and time-series partials."""
+    date_cols = df.select_dtypes(include=["datetime64"]).columns
+    return {
+        "rows": len(df),
+        "moments": Moments.from_frame(df),
+        "sketches": sketch_frame(df),
+        "comoments": CoMoments.from_frame(df),
+        "ts_partials": {date_col: TimeSeriesEngine.period_partials(df, date_col) for date_col in date_cols},
+    }
+
+
+def _run_shared(fn, shared):
+    df, segments = shared.attach()
+    try:
+        return fn(df)
+    finally:
+        # Views must be gone before the segments can be closed
+        del df
+        for segment in segments:
+            segment.close()
+
+
+class ChunkExecutor:
+    """Apply a function to a stream of chunks on a process pool, with chunks passed through shared memory.
+
+    Only numeric and datetime columns reach the workers, and each is copied
+    once into shared memory rather than pickled. At most `max_in_flight`
+    chunks are held at a time and results come back in chunk order. `fn`
+    must be a module-level function so it can be sent to worker processes.
+    Workers start from a forkserver rather than a fork of the caller, which
+    may be running other threads (Streamlit, the background LLM loop).
+    mode="thread" runs the same pipeline on threads without shared memory.
+    """
+
+    def __init__(self, max_workers=None, max_in_flight=None, mode="process"):
+        if mode not in ("process", "thread"):
+            raise ValueError(f"Unknown chunk executor mode: {mode}")
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_in_flight = max_in_flight or self.max_workers * 2
+        self.mode = mode
+
+    def map(self, fn, chunks):
+        """Yield fn(chunk) for every chunk, in order."""
+        if self.mode == "process":
+            executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context("forkserver")
+            )
+        else:
+            executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        pending = deque()
+
+        def finish(future, shared):
+            try:
+                return future.result()
+            finally:
+                if shared is not None:
+                    shared.release()
+
+        with executor:
+            try:
+                for chunk in chunks:
+                    if len(pending) >= self.max_in_flight:
+                        yield finish(*pending.popleft())
+                    if self.mode == "process":
+                        shared = SharedFrame(chunk)
+                        pending.append((executor.submit(_run_shared, fn, shared), shared))
+                    else:
+                        pending.append((executor.submit(fn, chunk), None))
+                while pending:
+                    yield finish(*pending.popleft())
+            finally:
+                # Free shared blocks of chunks still in flight if the caller stops early or a task failed
+                for future, shared in pending:
+                    future.cancel()
+                    if shared is not None:
+                        try:
+                            future.result()
+                        except Exception:
+                            pass
+                        shared.release()
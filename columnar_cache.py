@@ -0,0 +1,139 @@
+import os
+import json
+import hashlib
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+from disk_cache import CacheDirectory, atomic_write
+
+READ_BLOCK_SIZE = 1024 * 1024
+HASH_INDEX = "hashes.json"
+# Schema metadata field holding the reader version an entry was written with
+VERSION_KEY = b"cache_version"
+
+
+def content_hash(source):
+    """SHA-256 of a file path's or file-like object's bytes, read in blocks."""
+    digest = hashlib.sha256()
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            for block in iter(lambda: f.read(READ_BLOCK_SIZE), b""):
+                digest.update(block)
+    else:
+        source.seek(0)
+        for block in iter(lambda: source.read(READ_BLOCK_SIZE), b""):
+            digest.update(block)
+        source.seek(0)
+    return digest.hexdigest()
+
+
+class ColumnarCache:
+    """Cache of parsed datasets as uncompressed Feather (Arrow IPC) files, keyed by content hash.
+
+    The first load parses the source with the given reader and writes the
+    frame out in columnar form; later loads of the same bytes memory-map that
+    file instead of parsing again. Least recently used files are evicted once
+    the cache grows past `max_size_mb`. Content hashes of file paths are
+    remembered by (path, size, mtime), so an unchanged file is only read
+    again when one of those changes; uploaded file objects are always hashed.
+    """
+
+    def __init__(self, cache_dir=os.path.join("datasets", ".columnar_cache"), max_size_mb=2048, enabled=True):
+        self.cache_dir = cache_dir
+        self.enabled = enabled
+        self.files = CacheDirectory(cache_dir, ".feather", int(max_size_mb * 1024 * 1024))
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.feather")
+
+    def _read_index(self):
+        try:
+            with open(os.path.join(self.cache_dir, HASH_INDEX), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_index(self, index):
+        def write(tmp_path):
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(index, f)
+
+        try:
+            atomic_write(os.path.join(self.cache_dir, HASH_INDEX), write)
+        except OSError as e:
+            print(f"Not saving content hash index: {e}")
+
+    def _content_hash(self, source):
+        """Content hash of the source, reusing the last hash of a path whose size and mtime are unchanged."""
+        if not isinstance(source, str):
+            return content_hash(source)
+        path = os.path.abspath(source)
+        stat = os.stat(path)
+        index = self._read_index()
+        known = index.get(path)
+        if known and known[0] == stat.st_size and known[1] == stat.st_mtime_ns:
+            return known[2]
+        digest = content_hash(path)
+        # Forget files that no longer exist so the index does not grow without bound
+        index = {known_path: entry for known_path, entry in index.items() if os.path.exists(known_path)}
+        index[path] = [stat.st_size, stat.st_mtime_ns, digest]
+        self._write_index(index)
+        return digest
+
+    def load(self, source, reader, variant="", version=None):
+        """Return `reader(source)`, served from the columnar copy when the source bytes were seen before.
+
+        `variant` distinguishes different readers of the same bytes (e.g. the
+        file type). `version`, if given, is called for a string describing how
+        the reader parses (e.g. a schema fingerprint); it is stored inside the
+        entry, after the reader ran, and an entry whose version no longer
+        matches is rebuilt. It is not part of the key, so learning a schema on
+        the first load does not make the second load parse again.
+        """
+        if not self.enabled:
+            return reader(source)
+        key = hashlib.sha256(f"{self._content_hash(source)}:{variant}".encode("utf-8")).hexdigest()
+        path = self._path(key)
+        if self.files.use(path):
+            try:
+                table = feather.read_table(path, memory_map=True)
+                stored = (table.schema.metadata or {}).get(VERSION_KEY, b"").decode("utf-8")
+                if version is None or stored == version():
+                    self.files.count(hit=True)
+                    # One block per column and Arrow buffers released as they convert, so peak memory
+                    # stays near one copy of the frame
+                    return table.to_pandas(split_blocks=True, self_destruct=True)
+            except (OSError, pa.ArrowException):
+                self.files.remove(path)  # Corrupt entry: rebuild it
+
+        self.files.count(hit=False)
+        df = reader(source)
+        self._store(path, df, version() if version is not None else "")
+        return df
+
+    def _store(self, path, df, version):
+        # Feather needs a default index and string column names; anything else is just not cached
+        if not isinstance(df.index, pd.RangeIndex) or df.index.start != 0 or df.index.step != 1:
+            return
+        if not all(isinstance(col, str) for col in df.columns):
+            return
+
+        def write(tmp_path):
+            table = pa.Table.from_pandas(df)
+            table = table.replace_schema_metadata({**(table.schema.metadata or {}), VERSION_KEY: version.encode("utf-8")})
+            feather.write_feather(table, tmp_path, compression="uncompressed")
+
+        self.files.write(path, write, errors=(OSError, pa.ArrowException))
+
+    def evict(self):
+        """Drop least recently used entries until the cache is under max size."""
+        self.files.evict()
+
+    def clear(self):
+        """Remove every cached dataset."""
+        self.files.clear()
+        self.files.remove(os.path.join(self.cache_dir, HASH_INDEX))
+
+    def stats(self):
+        """Return hit/miss counters and current on-disk usage."""
+        return self.files.stats()
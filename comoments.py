@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+
+
+class CoMoments:
+    """Mergeable pairwise co-moments of numeric columns, for exact streamed covariance and Pearson correlation.
+
+    Like pandas, every pair only uses rows where both values are present, so
+    each statistic is kept per pair: `n[i, j]` rows, `mean[i, j]` (mean of
+    column i over those rows), `M2[i, j]` (sum of squared deviations of i
+    over them) and the co-moment `C[i, j]`. Chunks are centred on their own
+    column means before the products are summed, and merged with the pairwise
+    update of Chan et al., so the result matches `DataFrame.corr()` on the
+    full data regardless of how it was split.
+    """
+
+    FIELDS = ("n", "mean", "M2", "C")
+
+    def __init__(self, columns=(), n=None, mean=None, M2=None, C=None):
+        self.columns = pd.Index(columns)
+        size = len(self.columns)
+        self.n = n if n is not None else np.zeros((size, size))
+        self.mean = mean if mean is not None else np.zeros((size, size))
+        self.M2 = M2 if M2 is not None else np.zeros((size, size))
+        self.C = C if C is not None else np.zeros((size, size))
+
+    @classmethod
+    def from_frame(cls, df):
+        """Co-moments of every numeric column of a chunk, from a few matrix products."""
+        numeric = df.select_dtypes(include=[np.number])
+        values = numeric.to_numpy(dtype="float64", na_value=np.nan)
+        present = ~np.isnan(values)
+        weights = present.astype("float64")
+        counts = present.sum(axis=0)
+        centre = np.where(present, values, 0.0).sum(axis=0) / np.maximum(counts, 1)
+        centred = np.where(present, values - centre, 0.0)
+
+        n = weights.T @ weights
+        with np.errstate(invalid="ignore", divide="ignore"):
+            # offset[i, j]: mean of centred column i over rows where j is also present
+            offset = np.nan_to_num((centred.T @ weights) / n)
+        M2 = (centred ** 2).T @ weights - n * offset ** 2
+        C = centred.T @ centred - n * offset * offset.T
+        return cls(numeric.columns, n, centre[:, None] + offset, M2, C)
+
+    def _aligned(self, columns):
+        if self.columns.equals(columns):
+            return [getattr(self, field) for field in self.FIELDS]
+        return [
+            pd.DataFrame(getattr(self, field), index=self.columns, columns=self.columns)
+            .reindex(index=columns, columns=columns, fill_value=0.0).to_numpy()
+            for field in self.FIELDS
+        ]
+
+    def merge(self, other):
+        """Return the co-moments of the union of both inputs' rows."""
+        columns = self.columns.union(other.columns, sort=False)
+        na, mean_a, M2_a, C_a = self._aligned(columns)
+        nb, mean_b, M2_b, C_b = other._aligned(columns)
+        n = na + nb
+        with np.errstate(invalid="ignore", divide="ignore"):
+            weight = np.nan_to_num(na * nb / n)
+            delta = mean_b - mean_a
+            mean = mean_a + np.nan_to_num(delta * nb / n)
+        return CoMoments(
+            columns, n, mean,
+            M2_a + M2_b + delta ** 2 * weight,
+            C_a + C_b + delta * delta.T * weight,
+        )
+
+    def update(self, df):
+        """Fold another chunk into these co-moments in place and return self."""
+        merged = self.merge(CoMoments.from_frame(df))
+        self.__dict__.update(merged.__dict__)
+        return self
+
+    @classmethod
+    def combine(cls, parts):
+        """Merge an iterable of CoMoments, e.g. one per chunk or worker."""
+        total = cls()
+        for part in parts:
+            total = total.merge(part)
+        return total
+
+    def cov(self):
+        """Sample covariance matrix (pairwise complete), as from DataFrame.cov()."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cov = np.where(self.n > 1, self.C / (self.n - 1), np.nan)
+        return pd.DataFrame(cov, index=self.columns, columns=self.columns)
+
+    def corr(self):
+        """Pearson correlation matrix (pairwise complete), as from DataFrame.corr()."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            corr = self.C / np.sqrt(self.M2 * self.M2.T)
+        corr = np.where(self.n > 1, np.clip(corr, -1.0, 1.0), np.nan)
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
@@ -0,0 +1,149 @@
+import json
+import numpy as np
+import pandas as pd
+
+# OpenAI tokenizers average roughly four characters per token on English/JSON text
+CHARS_PER_TOKEN = 4
+
+# Progressively less detailed settings tried until the digest fits the budget
+DETAIL_LEVELS = [
+    {"sample_rows": 5, "top_k": 5, "correlations": 10, "max_columns": None},
+    {"sample_rows": 3, "top_k": 3, "correlations": 5, "max_columns": None},
+    {"sample_rows": 1, "top_k": 2, "correlations": 3, "max_columns": 60},
+    {"sample_rows": 0, "top_k": 1, "correlations": 0, "max_columns": 30},
+    {"sample_rows": 0, "top_k": 0, "correlations": 0, "max_columns": 10},
+]
+
+
+def estimate_tokens(text):
+    """Estimate the number of LLM tokens in a piece of text."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _round(value, digits=4):
+    """Round to a few significant digits so numbers don't waste tokens."""
+    if value is None or isinstance(value, (bool, np.bool_)):
+        return value
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        if not np.isfinite(value):
+            return None
+        return float(f"{value:.{digits}g}")
+    return value
+
+
+def _column_summary(series, top_k, context):
+    """Summarize a single column according to its type, from the context's shared statistics."""
+    col = series.name
+    nulls = int(context.null_counts()[col])
+    summary = {
+        "dtype": str(series.dtype),
+        "null_rate": _round(nulls / len(series)) if len(series) else 0.0,
+    }
+    moments = context.moments()
+    if pd.api.types.is_bool_dtype(series):
+        non_null = series.dropna()
+        summary["true_rate"] = _round(non_null.mean()) if len(non_null) else None
+    elif col in moments.columns:
+        if nulls < len(series):
+            quartiles = context.quartiles()[0][col]
+            q = [moments.at["min", col], *quartiles.tolist(), moments.at["max", col]]
+            summary.update({
+                "mean": _round(moments.at["mean", col]),
+                "std": _round(moments.at["std", col]),
+                "quantiles": [_round(v) for v in q],
+            })
+    elif pd.api.types.is_datetime64_any_dtype(series):
+        if nulls < len(series):
+            summary["min"] = series.min().isoformat()
+            summary["max"] = series.max().isoformat()
+    else:
+        profile = context.column_profiles()[col]
+        # Profiles count missing values as a distinct value, like nunique(dropna=False)
+        summary["distinct"] = int(profile["distinct"] - (1 if nulls else 0))
+        if top_k:
+            counts = list(profile["top_values"].items())[:top_k]
+            summary["top"] = {str(k)[:40]: int(v) for k, v in counts}
+    return summary
+
+
+def _strongest_correlations(context, limit):
+    if limit == 0:
+        return []
+    corr = context.correlation()
+    if corr.shape[1] < 2:
+        return []
+    cols = corr.columns
+    corr = corr.to_numpy()
+    rows, cols_idx = np.triu_indices(len(cols), k=1)
+    values = corr[rows, cols_idx]
+    valid = ~np.isnan(values)
+    rows, cols_idx, values = rows[valid], cols_idx[valid], values[valid]
+    order = np.argsort(-np.abs(values))[:limit]
+    return [[str(cols[rows[i]]), str(cols[cols_idx[i]]), _round(values[i], 3)] for i in order]
+
+
+def _representative_rows(df, n):
+    """Pick evenly spaced rows so the sample covers the whole file, not just its head."""
+    if n == 0 or df.empty:
+        return []
+    positions = np.unique(np.linspace(0, len(df) - 1, num=min(n, len(df))).astype(int))
+    sample = df.iloc[positions]
+    rows = json.loads(sample.to_json(orient="values", date_format="iso", default_handler=str))
+    return [[_round(value) for value in row] for row in rows]
+
+
+def _trim(summary, top_k):
+    if "top" not in summary:
+        return summary
+    trimmed = dict(summary)
+    if top_k:
+        trimmed["top"] = dict(list(summary["top"].items())[:top_k])
+    else:
+        del trimmed["top"]
+    return trimmed
+
+
+def build_digest(df, token_budget=1500, context=None):
+    """Build a compact JSON summary of a DataFrame that fits a target token budget.
+
+    The digest covers schema, null rates, quantiles, top categories, the
+    strongest correlations and a few representative rows, dropping detail
+    until it fits. Statistics are read from the frame's AnalysisContext, so
+    they are shared with every other caller instead of computed again.
+    """
+    if context is None:
+        from analysis_context import context_for  # analysis_context imports this module
+        context = context_for(df)
+    # Compute everything once at the most detailed level; lower levels only trim it
+    richest = DETAIL_LEVELS[0]
+    summaries = {col: _column_summary(df[col], richest["top_k"], context) for col in df.columns}
+    strongest = _strongest_correlations(context, richest["correlations"])
+    rows = _representative_rows(df, richest["sample_rows"])
+
+    text = ""
+    for level in DETAIL_LEVELS:
+        columns = list(df.columns)
+        if level["max_columns"] is not None:
+            columns = columns[:level["max_columns"]]
+        kept = {str(col) for col in columns}
+        digest = {
+            "rows": int(len(df)),
+            "columns": int(df.shape[1]),
+            "schema": {str(col): _trim(summaries[col], level["top_k"]) for col in columns},
+        }
+        if len(columns) < df.shape[1]:
+            digest["omitted_columns"] = int(df.shape[1] - len(columns))
+        pairs = [p for p in strongest if p[0] in kept and p[1] in kept][:level["correlations"]]
+        if pairs:
+            digest["strongest_correlations"] = pairs
+        if level["sample_rows"] and rows:
+            positions = [df.columns.get_loc(col) for col in columns]
+            digest["sample_columns"] = [str(col) for col in columns]
+            digest["sample_rows"] = [[row[i] for i in positions] for row in rows[:level["sample_rows"]]]
+        text = json.dumps(digest, separators=(",", ":"), default=str)
+        if estimate_tokens(text) <= token_budget:
+            return text
+    # Even the smallest level is too large: truncate rather than exceed the budget
+    return text[:token_budget * CHARS_PER_TOKEN]
@@ -1,16 +1,28 @@
 import os
 import requests
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import re
 import json
 import numpy as np
+from streaming_ingest import ChunkedSource
+from columnar_cache import ColumnarCache
+from schema_registry import SchemaRegistry, apply_dtypes
+from quantile_sketch import column_quantiles, sketch_frame, sketch_quantiles, SKETCH_THRESHOLD
+from cardinality_sketch import constant_columns, sketch_columns
+from analysis_context import context_for
+from plot_service import PlotService
+from density_bins import density_grid, DENSITY_THRESHOLD
+from downsample import downsample_series, DEFAULT_MAX_POINTS
+from drift import ReferenceProfile, detect_drift
 
 class DatasetManager:
-    def __init__(self, base_folder="datasets"):
+    def __init__(self, base_folder="datasets", use_columnar_cache=True, plot_service=None):
         self.base_folder = base_folder
         os.makedirs(self.base_folder, exist_ok=True)
+        self.columnar_cache = ColumnarCache(os.path.join(base_folder, ".columnar_cache"), enabled=use_columnar_cache)
+        self.schema_registry = SchemaRegistry(base_folder)
+        # Pass a long-lived service to keep its worker pool and in-memory figures across managers
+        self.plot_service = plot_service or PlotService(os.path.join(base_folder, ".plot_cache"))
 
     def download_dataset(self, url, dataset_name, file_name):
         """Download a dataset if it doesn't already exist."""
@@ -29,57 +41,95 @@ class DatasetManager:
 
         return file_path
 
-    def load_dataset(self, file_path):
-        """Load a dataset into a pandas DataFrame."""
-        if file_path.endswith('.csv'):
-            return pd.read_csv(file_path)
-        elif file_path.endswith('.json'):
-            return pd.read_json(file_path)
-        elif file_path.endswith('.xlsx'):
-            return pd.read_excel(file_path)
+    def load_dataset(self, file_path, chunksize=None, dataset_name=None):
+        """Load a dataset into a pandas DataFrame, or stream it as a ChunkedSource when `chunksize` is given.
+
+        Whole-file loads go through the columnar cache, so a file is only parsed
+        the first time its contents are seen. With a `dataset_name`, the frame
+        uses the compact dtypes recorded in the schema registry (learned on the
+        first load) and the memory saving is reported.
+        """
+        if chunksize:
+            return ChunkedSource(file_path, chunksize=chunksize)
+        file_type = os.path.splitext(file_path)[1].lstrip('.').lower()
+        if not dataset_name:
+            return self.columnar_cache.load(file_path, lambda path: self.read_file(path, file_type), variant=file_type)
+
+        schema = self.schema_registry.get(dataset_name)
+        # Keyed on the source only; the entry records the schema it was parsed with, so the load
+        # that learns the schema already writes the entry later loads reuse
+        df = self.columnar_cache.load(
+            file_path, lambda path: self._read_with_schema(path, file_type, dataset_name, schema),
+            variant=f"{file_type}:{dataset_name}",
+            version=lambda: SchemaRegistry.fingerprint(self.schema_registry.get(dataset_name))
+        )
+        self.schema_registry.report(dataset_name, self.schema_registry.get(dataset_name))
+        return df
+
+    def _read_with_schema(self, source, file_type, dataset_name, schema):
+        if schema is not None:
+            try:
+                if file_type == 'csv':
+                    # Known dtypes let pandas skip inference and parse straight into the compact types
+                    df = pd.read_csv(source, **SchemaRegistry.read_csv_kwargs(schema))
+                    return apply_dtypes(df, schema["dtypes"])
+                return apply_dtypes(self.read_file(source, file_type), schema["dtypes"])
+            except (ValueError, TypeError, OverflowError) as e:
+                print(f"Stored schema for {dataset_name} no longer fits the data ({e}); relearning it")
+        return self.schema_registry.learn(dataset_name, self.read_file(source, file_type))[1]
+
+    @staticmethod
+    def read_file(source, file_type):
+        """Parse a CSV, JSON or Excel source (path or file-like object) into a DataFrame."""
+        file_type = file_type.lstrip('.').lower()
+        if file_type == 'csv':
+            return pd.read_csv(source)
+        elif file_type == 'json':
+            return pd.read_json(source)
+        elif file_type in ('xlsx', 'xls'):
+            return pd.read_excel(source)
         else:
             raise ValueError("Unsupported file format")
 
     def generate_plots(self, df, output_folder):
         """Generate basic plots for a dataset."""
         os.makedirs(output_folder, exist_ok=True)
-
-        # Pairplot
-        numeric_df = df.select_dtypes(include=['number'])  # Select only numeric columns
+        context = context_for(df)
+        numeric_df = context.numeric()  # Select only numeric columns
+        jobs = []
         if not numeric_df.empty:  # Check if there are numeric columns
-            sns.pairplot(numeric_df)
-            plt.savefig(os.path.join(output_folder, 'pairplot.png'))
-            plt.close()
-
-        # Correlation heatmap
-        numeric_df = df.select_dtypes(include=['number'])  # Select only numeric columns
-        if not numeric_df.empty:  # Check if there are numeric columns
-            plt.figure(figsize=(10, 8))
-            sns.heatmap(numeric_df.corr(), annot=True, cmap='coolwarm')
-            plt.savefig(os.path.join(output_folder, 'correlation_heatmap.png'))
-            plt.close()
+            jobs.append(self._pairplot_job(numeric_df, os.path.join(output_folder, 'pairplot.png')))
+            jobs.append(("heatmap", context.correlation(), {"figsize": (10, 8)},
+                         os.path.join(output_folder, 'correlation_heatmap.png')))
 
         # Histograms
-        for column in df.select_dtypes(include=['number']).columns:
+        for column in numeric_df.columns:
             sanitized_column = re.sub(r'[^a-zA-Z0-9_]', '_', column)  # Replace invalid characters with underscores
-            plt.figure()
-            sns.histplot(df[column], kde=True)
-            plt.title(f"Histogram of {column}")
-            plt.savefig(os.path.join(output_folder, f"{sanitized_column}_histogram.png"))
-            plt.close()
+            jobs.append(("histogram", df[column], {"title": f"Histogram of {column}"},
+                         os.path.join(output_folder, f"{sanitized_column}_histogram.png")))
 
+        # Figures are rendered in parallel and reused when the same data was plotted before
+        self.plot_service.render_many(jobs)
         print(f"Plots saved to {output_folder}")
 
-    def advanced_stats(self, df, output_folder):
-        """Perform advanced statistical analysis on the dataset and save to CSV."""
+    def advanced_stats(self, df, output_folder, sketch_threshold=SKETCH_THRESHOLD):
+        """Perform advanced statistical analysis on the dataset, save it to CSV and return it.
+
+        Above `sketch_threshold` rows, medians come from quantile sketches and
+        `median_rank_error` gives their normalized rank error bound.
+        """
+        # Mean, std, skew and kurtosis of every column come from a single pass
+        summary = context_for(df).moments()
+        medians, median_errors = column_quantiles(df, [0.5], threshold=sketch_threshold)
         stats = {}
-        for column in df.select_dtypes(include=['number']).columns:
+        for column in summary.columns:
             stats[column] = {
-                "mean": df[column].mean(),
-                "median": df[column].median(),
-                "std_dev": df[column].std(),
-                "skewness": df[column].skew(),
-                "kurtosis": df[column].kurt()
+                "mean": float(summary.at["mean", column]),
+                "median": float(medians.at[0.5, column]),
+                "median_rank_error": median_errors[column],
+                "std_dev": float(summary.at["std", column]),
+                "skewness": float(summary.at["skew", column]),
+                "kurtosis": float(summary.at["kurt", column])
             }
 
         # Save stats to a CSV file
@@ -88,19 +138,20 @@ class DatasetManager:
         stats_file = os.path.join(output_folder, "advanced_stats.csv")
         stats_df.to_csv(stats_file)
         print(f"Advanced stats saved to {stats_file}")
+        return stats
 
-    def generate_time_series_plots(self, df, output_folder):
-        """Generate time-series plots for securities data."""
-        os.makedirs(output_folder, exist_ok=True)
-
-        for column in df.select_dtypes(include=['number']).columns:
-            plt.figure()
-            df[column].plot(title=f"Time Series of {column}")
-            plt.xlabel("Index")
-            plt.ylabel(column)
-            plt.savefig(os.path.join(output_folder, f"{column}_time_series.png"))
-            plt.close()
+    def generate_time_series_plots(self, df, output_folder, max_points=DEFAULT_MAX_POINTS, method="lttb"):
+        """Generate time-series plots for securities data.
 
+        Each series is downsampled to about `max_points` points first, with
+        LTTB or min/max bucketing (`method="minmax"`) so peaks and troughs survive.
+        """
+        os.makedirs(output_folder, exist_ok=True)
+        self.plot_service.render_many(
+            ("line", downsample_series(df[column], max_points, method), {"title": f"Time Series of {column}", "xlabel": "Index", "ylabel": column},
+             os.path.join(output_folder, f"{column}_time_series.png"))
+            for column in df.select_dtypes(include=['number']).columns
+        )
         print(f"Time-series plots saved to {output_folder}")
 
     def clean_and_validate_data(self, df):
@@ -126,8 +177,7 @@ class DatasetManager:
                 df[f'{col}_outlier'] = (np.abs(df[col] - df[col].mean()) > 3 * df[col].std())
 
         # --- Remove constant columns, but log them for transparency ---
-        nunique = df.nunique(dropna=False)
-        constant_cols = nunique[nunique == 1].index.tolist()
+        constant_cols = constant_columns(df)
         profile_constant_cols = {col: df[col].iloc[0] if len(df) > 0 else None for col in constant_cols}
         df = df.drop(columns=constant_cols)
 
@@ -137,32 +187,111 @@ class DatasetManager:
 
         return df, profile_constant_cols
 
-    def profile_dataset(self, df, output_folder):
-        """Generate a detailed profile of the dataset and save to a file."""
+    def stream_profile(self, source):
+        """Row count, missing values, numeric ranges, quartiles and column sketches over every chunk of a ChunkedSource.
+
+        Quartiles come from KLL sketches, with their normalized rank error
+        bound in `numeric_quantiles_rank_error`; distinct counts come from
+        HyperLogLog, with their relative error in each column profile.
+        """
+        rows = 0
+        missing = None
+        minimum = maximum = None
+        sketches = {}
+        quantile_sketches = {}
+        for chunk in source:
+            rows += len(chunk)
+            sketch_columns(chunk, sketches)
+            sketch_frame(chunk, sketches=quantile_sketches)
+            chunk_missing = chunk.isnull().sum()
+            missing = chunk_missing if missing is None else missing + chunk_missing
+            numeric = chunk.select_dtypes(include=[np.number])
+            chunk_min, chunk_max = numeric.min(), numeric.max()
+            minimum = chunk_min if minimum is None else np.fmin(minimum, chunk_min)
+            maximum = chunk_max if maximum is None else np.fmax(maximum, chunk_max)
+        quartiles, rank_errors = sketch_quantiles(quantile_sketches, [0.25, 0.5, 0.75])
+        return {
+            "rows": rows,
+            "missing_values": missing.astype(int).to_dict() if missing is not None else {},
+            "numeric_ranges": {
+                col: {"min": float(minimum[col]), "max": float(maximum[col])} for col in (minimum.index if minimum is not None else [])
+            },
+            "numeric_quantiles": quartiles.rename(index=lambda q: f"{q:.0%}").to_dict(),
+            "numeric_quantiles_rank_error": rank_errors,
+            "coerced_values": dict(source.coerced),
+            "widened_columns": dict(source.widened),
+            "column_profiles": {col: sketch.summary() for col, sketch in sketches.items()}
+        }
+
+    @staticmethod
+    def _statistical_summary(df, context, sketch_threshold):
+        """Same statistics as describe(include='all'), from sketches above `sketch_threshold` rows.
+
+        Large frames take count, mean, std, min and max from one moments pass,
+        quartiles from KLL sketches and unique/top/freq from the column
+        profiles. Returns (summary, {column: normalized rank error of its quartiles}).
+        """
+        if len(df) <= sketch_threshold:
+            return context.describe(include='all').to_dict(), {col: 0.0 for col in context.numeric_columns()}
+        moments = context.moments().loc[["count", "mean", "std", "min", "max"]]
+        quartiles, rank_errors = column_quantiles(df, [0.25, 0.5, 0.75], threshold=sketch_threshold)
+        numeric = pd.concat([moments, quartiles.rename(index=lambda q: f"{q:.0%}")])
+        summary = numeric.reindex(["count", "mean", "std", "min", "25%", "50%", "75%", "max"]).to_dict()
+        profiles = context.column_profiles()
+        for col in df.columns:
+            if col in summary:
+                continue
+            top, freq = next(iter(profiles[col]["top_values"].items()), (None, None))
+            summary[col] = {"count": int(df[col].count()), "unique": profiles[col]["distinct"], "top": top, "freq": freq}
+        return summary, rank_errors
+
+    def profile_dataset(self, df, output_folder, core_model=None, sketch_threshold=SKETCH_THRESHOLD):
+        """Generate a detailed profile of the dataset and save to a file.
+
+        Pass the caller's CoreModel to reuse its LLM backend and cache; otherwise
+        one is built from OPENAI_API_KEY and CORE_MODEL_BACKEND. Above
+        `sketch_threshold` rows, quartiles and distinct counts come from
+        sketches: `quantile_rank_error` bounds the quartiles and each column
+        profile carries its distinct-count error. `df` may be a ChunkedSource:
+        the first chunk is profiled in detail, while row counts, missing values,
+        numeric ranges and quartiles are streamed over the whole file.
+        """
+        full_profile = None
+        if isinstance(df, ChunkedSource):
+            full_profile = self.stream_profile(df)
+            df = df.head()
+
         # --- Clean and Validate Data ---
         df, profile_constant_cols = self.clean_and_validate_data(df)
 
         # ---- Extra Verification and Logging ----
-        null_counts = df.isnull().sum()
-        nunique_counts = df.nunique(dropna=False)
+        context = context_for(df)
+        null_counts = context.null_counts()
         all_null_cols = null_counts[null_counts == df.shape[0]].index.tolist()
-        constant_cols = nunique_counts[nunique_counts == 1].index.tolist()
 
         # --- Profile Construction ---
+        statistical_summary, quantile_rank_error = self._statistical_summary(df, context, sketch_threshold)
         profile = {
             "data_types": df.dtypes.apply(lambda x: str(x)).to_dict(),
-            "missing_values": df.isnull().sum().to_dict(),
-            "statistical_summary": df.describe(include='all').to_dict(),
+            "missing_values": null_counts.to_dict(),
+            "statistical_summary": statistical_summary,
+            "quantile_rank_error": quantile_rank_error,
             "constant_columns": profile_constant_cols,
-            "all_null_columns": all_null_cols
+            "all_null_columns": all_null_cols,
+            # Distinct counts and top values, sketched in bounded memory for large frames
+            "column_profiles": context.column_profiles()
         }
+        if full_profile is not None:
+            profile["sampled_rows"] = len(df)
+            profile.update(full_profile)
 
         # --- LLM Data Quality, Target, and Model Suggestions ---
-        from main import CoreModel
-        import openai
-        api_key = os.environ.get("OPENAI_API_KEY", "")
-        core_model = CoreModel(api_key)
-        stats_json = df.describe(include='all').to_json(date_format='iso')
+        if core_model is None:
+            from main import CoreModel
+            from llm_backends import make_backend
+            api_key = os.environ.get("OPENAI_API_KEY", "")
+            core_model = CoreModel(api_key, backend=make_backend(os.environ.get("CORE_MODEL_BACKEND"), api_key))
+        stats_json = context.digest(core_model.digest_token_budget)
         validation_prompt = f"""
 You are a data quality expert. Analyze the following statistical summary and suggest any real-world data quality concerns.
 
@@ -179,8 +308,11 @@ You are a data quality expert. Analyze the following statistical summary and sug
 
 Statistics: {stats_json}
 """
-        profile['llm_data_quality'] = core_model.generate_insights(validation_prompt)
-        profile['llm_target_and_model_suggestions'] = core_model.suggest_target_and_models(df)
+        # Both LLM calls are independent, so run them concurrently
+        profile.update(core_model.run_batch({
+            'llm_data_quality': core_model.agenerate_insights(validation_prompt),
+            'llm_target_and_model_suggestions': core_model.asuggest_target_and_models(df)
+        }))
 
         def convert(obj):
             import pandas as pd
@@ -214,15 +346,26 @@ Statistics: {stats_json}
         return profile
 
     # --- Feature/Data Drift Detection ---
-    @staticmethod
-    def detect_drift(df1, df2):
-        from scipy.stats import ks_2samp
-        drift_report = {}
-        for col in df1.select_dtypes(include=[np.number]):
-            if col in df2.columns:
-                stat, p_value = ks_2samp(df1[col].dropna(), df2[col].dropna())
-                drift_report[col] = {"ks_stat": stat, "p_value": p_value}
-        return drift_report
+    def drift_reference_path(self, dataset_name):
+        return os.path.join(self.base_folder, dataset_name, "drift_reference.json")
+
+    def save_drift_reference(self, dataset_name, data):
+        """Profile baseline data (a DataFrame or chunks) in one pass and store it for later drift checks."""
+        profile = ReferenceProfile.build(data)
+        profile.save(self.drift_reference_path(dataset_name))
+        print(f"Drift reference for {dataset_name} saved to {self.drift_reference_path(dataset_name)}")
+        return profile
+
+    def detect_drift(self, reference, current, alpha=0.05, psi_threshold=0.2):
+        """KS/PSI drift for numeric columns and chi-square/PSI drift for categorical ones.
+
+        `reference` is the name of a dataset with a saved drift reference, a
+        ReferenceProfile, or baseline data; `current` is a DataFrame or an
+        iterable of chunks (such as a ChunkedSource), streamed once.
+        """
+        if isinstance(reference, str):
+            reference = ReferenceProfile.load(self.drift_reference_path(reference))
+        return detect_drift(reference, current, alpha, psi_threshold)
 
     def sanitize_filename(self, name):
         """Sanitize a string to be used as a valid filename."""
@@ -232,21 +375,17 @@ Statistics: {stats_json}
         """Generate distribution plots for each numeric column in the dataset."""
         os.makedirs(output_folder, exist_ok=True)
         distribution_plots = {}
+        jobs = []
 
         for column in df.select_dtypes(include=[np.number]).columns:
-            plt.figure(figsize=(8, 6))
-            sns.histplot(df[column].dropna(), kde=True, bins=30, color='blue')
-            plt.title(f"Distribution of {column}")
-            plt.xlabel(column)
-            plt.ylabel("Frequency")
-
             sanitized_column = self.sanitize_filename(column)
             plot_path = os.path.join(output_folder, f"{sanitized_column}_distribution.png")
-            plt.savefig(plot_path)
-            plt.close()
-
+            params = {"kde": True, "bins": 30, "color": "blue", "figsize": (8, 6),
+                      "title": f"Distribution of {column}", "xlabel": column, "ylabel": "Frequency"}
+            jobs.append(("histogram", df[column], params, plot_path))
             distribution_plots[column] = plot_path
 
+        self.plot_service.render_many(jobs)
         return distribution_plots
 
     def calculate_skewness(self, series):
@@ -258,28 +397,31 @@ Statistics: {stats_json}
         # Example: Add basic feature engineering logic here
         features = df.copy()
         for column in df.select_dtypes(include=[np.number]).columns:
-            features[f"{column}_squared"] = df[column] ** 2
-            features[f"{column}_sqrt"] = np.sqrt(df[column].clip(lower=0))
+            # Compute in float64: compact integer columns would silently wrap when squared
+            values = df[column].astype("float64")
+            features[f"{column}_squared"] = values ** 2
+            features[f"{column}_sqrt"] = np.sqrt(values.clip(lower=0))
         return features
 
     def generate_scatter_plot(self, df, selected_features, output_folder):
         """Generate scatter plot for selected features."""
         os.makedirs(output_folder, exist_ok=True)
-        plt.figure(figsize=(8, 6))
-        sns.pairplot(df[selected_features])
         plot_path = os.path.join(output_folder, "scatter_plot.png")
-        plt.savefig(plot_path)
-        plt.close()
+        self.plot_service.render_many([self._pairplot_job(df[selected_features], plot_path)])
         return plot_path
 
+    @staticmethod
+    def _pairplot_job(df, plot_path, density_threshold=DENSITY_THRESHOLD):
+        """Point pairplot for small frames; above `density_threshold` rows, a pairplot of binned counts."""
+        if len(df) > density_threshold:
+            return ("density_pairplot", density_grid(df, df.columns.tolist()), {}, plot_path)
+        return ("pairplot", df, {}, plot_path)
+
     def generate_correlation_heatmap(self, df, output_folder):
         """Generate correlation heatmap for selected features."""
         os.makedirs(output_folder, exist_ok=True)
-        plt.figure(figsize=(10, 8))
-        sns.heatmap(df.corr(), annot=True, cmap="coolwarm", fmt=".2f")
         plot_path = os.path.join(output_folder, "correlation_heatmap_selected.png")
-        plt.savefig(plot_path)
-        plt.close()
+        self.plot_service.render("heatmap", df.corr(), {"fmt": ".2f", "figsize": (10, 8)}, path=plot_path)
         return plot_path
 
 # Example usage
@@ -0,0 +1,91 @@
+import itertools
+import numpy as np
+import pandas as pd
+
+# Above this many rows scatter-style plots are drawn from binned counts instead of points
+DENSITY_THRESHOLD = 10_000
+
+
+def column_ranges(chunks, columns):
+    """(min, max) of each column over an iterable of chunks, in one pass."""
+    lows, highs = {}, {}
+    for chunk in chunks:
+        for col in columns:
+            values = pd.to_numeric(chunk[col], errors="coerce")
+            low, high = values.min(), values.max()
+            if pd.notna(low):
+                lows[col] = min(low, lows.get(col, low))
+                highs[col] = max(high, highs.get(col, high))
+    return {col: (float(lows[col]), float(highs[col])) for col in columns if col in lows}
+
+
+class DensityGrid:
+    """Binned counts for every column (1D) and every pair of columns (2D), built chunk by chunk.
+
+    Bin edges are fixed up front from each column's range, so grids from
+    different chunks or workers can be merged by adding counts. A pair only
+    counts rows where both values are present. Plotting the grid costs the
+    same for a thousand rows as for a hundred million. Columns without a
+    range (no numeric values at all) are left out and listed in `skipped`.
+    """
+
+    def __init__(self, columns, ranges, bins=64):
+        self.columns = [col for col in columns if col in ranges]
+        self.skipped = [col for col in columns if col not in ranges]
+        if self.skipped:
+            print(f"Density grid skips columns with no numeric values: {self.skipped}")
+        self.bins = bins
+        self.edges = {}
+        for col in self.columns:
+            low, high = ranges[col]
+            if low == high:  # a constant column still needs a non-empty bin
+                low, high = low - 0.5, high + 0.5
+            self.edges[col] = np.linspace(low, high, bins + 1)
+        self.counts = {col: np.zeros(bins) for col in self.columns}
+        self.pair_counts = {pair: np.zeros((bins, bins)) for pair in itertools.combinations(self.columns, 2)}
+        self.rows = 0
+
+    def update(self, chunk):
+        """Add one chunk's values to the counts and return self."""
+        values = {col: pd.to_numeric(chunk[col], errors="coerce").to_numpy(dtype="float64") for col in self.columns}
+        for col in self.columns:
+            column = values[col]
+            self.counts[col] += np.histogram(column[~np.isnan(column)], bins=self.edges[col])[0]
+        for x, y in self.pair_counts:
+            present = ~(np.isnan(values[x]) | np.isnan(values[y]))
+            self.pair_counts[(x, y)] += np.histogram2d(
+                values[x][present], values[y][present], bins=[self.edges[x], self.edges[y]]
+            )[0]
+        self.rows += len(chunk)
+        return self
+
+    def merge(self, other):
+        """Add the counts of a grid built with the same columns and edges."""
+        if self.columns != other.columns or any(
+            not np.array_equal(self.edges[col], other.edges[col]) for col in self.columns
+        ):
+            raise ValueError("Density grids can only be merged when their columns and bin edges match")
+        for col in self.columns:
+            self.counts[col] += other.counts[col]
+        for pair in self.pair_counts:
+            self.pair_counts[pair] += other.pair_counts[pair]
+        self.rows += other.rows
+        return self
+
+
+def density_grid(data, columns, bins=64, ranges=None):
+    """DensityGrid of `columns` over a DataFrame or an iterable of chunks.
+
+    `ranges` ({column: (min, max)}) may be partial: columns it lacks get their
+    range from a first pass, so chunked input must then be re-iterable (such
+    as a ChunkedSource).
+    """
+    chunks = [data] if isinstance(data, pd.DataFrame) else data
+    ranges = dict(ranges or {})
+    missing = [col for col in columns if col not in ranges]
+    if missing:
+        ranges.update(column_ranges(chunks, missing))
+    grid = DensityGrid(columns, ranges, bins)
+    for chunk in chunks:
+        grid.update(chunk)
+    return grid
@@ -0,0 +1,164 @@
+import os
+import time
+import tempfile
+import threading
+
+# Expired entries are swept at least once every this many writes
+SWEEP_EVERY_WRITES = 500
+# Size eviction frees down to this fraction of the limit, so the next writes do not rescan at once
+EVICT_LOW_WATER = 0.9
+
+
+def atomic_write(path, write):
+    """Create `path` by calling `write(tmp_path)` and renaming; return the size of the file it replaced (0 if none)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # A unique temp name per write, since threads of one process may write the same path at once
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    os.close(fd)
+    try:
+        write(tmp_path)
+        try:
+            replaced = os.path.getsize(path)
+        except OSError:
+            replaced = 0
+        os.replace(tmp_path, path)
+    except BaseException:
+        CacheDirectory.remove(tmp_path)
+        raise
+    return replaced
+
+
+class CacheDirectory:
+    """Directory of cache files bounded by total size and, optionally, by age.
+
+    Shared by the LLM, columnar and plot caches, which only decide what goes
+    in an entry. Entries are the files ending in `suffix`, directly in
+    `directory` or one level of shard subdirectories below it. A file's mtime
+    is its creation time, which `ttl_seconds` is measured from; its atime is
+    its last use, which size-based eviction orders by. Writes are atomic and
+    best effort: a failed write is logged and reported, never raised. The
+    running size and hit/miss counters are safe to update from several threads.
+    """
+
+    def __init__(self, directory, suffix, max_size_bytes, ttl_seconds=None):
+        self.directory = directory
+        self.suffix = suffix
+        self.max_size_bytes = max_size_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        # Running on-disk size, so writes only scan the directory when it crosses the limit
+        self._size_bytes = None
+        self._writes_since_sweep = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def remove(path):
+        # Another thread or process may have evicted the entry already
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _is_expired(self, created, now=None):
+        if not self.ttl_seconds:
+            return False
+        now = now or time.time()
+        return now - created > self.ttl_seconds
+
+    def count(self, hit):
+        """Record a lookup as a hit or a miss."""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def use(self, path):
+        """Return True if `path` holds a live entry, recording the use for eviction; expired entries are removed."""
+        try:
+            created = os.stat(path).st_mtime
+            if self._is_expired(created):
+                self.remove(path)
+                return False
+            # Record the use in atime only: mtime stays the creation time the TTL is measured from
+            os.utime(path, (time.time(), created))
+        except OSError:
+            return False
+        return True
+
+    def write(self, path, write, errors=(OSError,)):
+        """Atomically create `path` by calling `write(tmp_path)`; return False, logging why, if that fails."""
+        try:
+            replaced = atomic_write(path, write)
+            written = os.path.getsize(path)
+        except errors as e:
+            print(f"Not caching {os.path.basename(path)} in {self.directory}: {e}")
+            return False
+
+        with self._lock:
+            if self._size_bytes is None:
+                self._size_bytes = sum(size for _, size, *_ in self.entries())
+            else:
+                self._size_bytes += written - replaced
+            self._writes_since_sweep += 1
+            full = self._size_bytes > self.max_size_bytes or self._writes_since_sweep >= SWEEP_EVERY_WRITES
+        if full:
+            self.evict()
+        return True
+
+    def entries(self):
+        """Yield (path, size, created, last_used) for every entry."""
+        for entry in os.scandir(self.directory):
+            if entry.is_dir():
+                yield from self._scan(entry.path)
+        yield from self._scan(self.directory)
+
+    def _scan(self, directory):
+        for entry in os.scandir(directory):
+            if entry.name.endswith(self.suffix):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                yield entry.path, stat.st_size, stat.st_mtime, stat.st_atime
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones until under max size."""
+        with self._lock:
+            now = time.time()
+            live = []
+            for path, size, created, used in self.entries():
+                if self._is_expired(created, now):
+                    self.remove(path)
+                else:
+                    live.append((used, size, path))
+
+            total = sum(size for _, size, _ in live)
+            if total > self.max_size_bytes:
+                target = self.max_size_bytes * EVICT_LOW_WATER
+                for _, size, path in sorted(live):
+                    self.remove(path)
+                    total -= size
+                    if total <= target:
+                        break
+            self._size_bytes = total
+            self._writes_since_sweep = 0
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            for path, *_ in list(self.entries()):
+                self.remove(path)
+            self._size_bytes = 0
+
+    def stats(self):
+        """Return hit/miss counters and current on-disk usage."""
+        entries = list(self.entries())
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(entries),
+            "size_bytes": sum(size for _, size, *_ in entries),
+        }
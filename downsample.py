@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+
+# Points kept per plotted series unless a caller asks otherwise
+DEFAULT_MAX_POINTS = 2000
+
+
+def _as_float(x):
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64) or np.issubdtype(x.dtype, np.timedelta64):
+        return x.astype("int64").astype("float64")
+    return x.astype("float64")
+
+
+def lttb_indices(x, y, n_out):
+    """Positions kept by Largest-Triangle-Three-Buckets downsampling of (x, y) to `n_out` points.
+
+    The first and last points are always kept; every bucket in between keeps
+    the point forming the largest triangle with the point kept before it and
+    the mean of the next bucket, which preserves peaks and troughs.
+    """
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1])[:max(n_out, 0)]
+    x, y = _as_float(x), _as_float(y)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)  # n_out - 2 inner buckets
+    kept = np.empty(n_out, dtype=int)
+    kept[0], kept[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(n_out - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        next_stop = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_x, next_y = x[stop:next_stop].mean(), y[stop:next_stop].mean()
+        area = np.abs(
+            (x[previous] - next_x) * (y[start:stop] - y[previous])
+            - (x[previous] - x[start:stop]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        kept[bucket + 1] = previous
+    return kept
+
+
+def minmax_indices(y, n_out):
+    """Positions of the minimum and maximum of each of `n_out // 2` equal buckets, in order."""
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+    y = _as_float(y)
+    buckets = np.minimum(np.arange(n) * max(n_out // 2, 1) // n, max(n_out // 2, 1) - 1)
+    order = np.lexsort((y, buckets))  # by bucket, then value
+    starts = np.searchsorted(buckets[order], np.arange(buckets[-1] + 1))
+    stops = np.append(starts[1:], n) - 1
+    return np.unique(np.concatenate([order[starts], order[stops], [0, n - 1]]))
+
+
+def downsample_indices(x, y, n_out=DEFAULT_MAX_POINTS, method="lttb"):
+    """Positions to keep when plotting (x, y) with about `n_out` points; NaN values are skipped."""
+    if method not in ("lttb", "minmax"):
+        raise ValueError(f"Unknown downsampling method: {method}")
+    valid = np.flatnonzero(~np.isnan(_as_float(y)))
+    if method == "lttb":
+        return valid[lttb_indices(np.asarray(x)[valid], np.asarray(y)[valid], n_out)]
+    return valid[minmax_indices(np.asarray(y)[valid], n_out)]
+
+
+def downsample_series(series, n_out=DEFAULT_MAX_POINTS, method="lttb"):
+    """The points of a Series (plotted against its index) that keep its visual shape."""
+    if len(series) <= n_out:
+        return series
+    index = series.index
+    numeric_index = pd.api.types.is_numeric_dtype(index) or pd.api.types.is_datetime64_any_dtype(index)
+    x = index.to_numpy() if numeric_index else np.arange(len(series))
+    return series.iloc[downsample_indices(x, series.to_numpy(dtype="float64", na_value=np.nan), n_out, method)]
+
+
+def downsample_arrays(x, arrays, n_out=DEFAULT_MAX_POINTS, method="lttb"):
+    """Downsample several series sharing the x values `x` to one common set of positions.
+
+    Each series gets an equal share of `n_out` and the positions kept for any
+    of them are kept for all, so every series keeps its own extremes.
+    """
+    if not n_out or len(x) <= n_out:
+        return x, list(arrays)
+    share = max(n_out // max(len(arrays), 1), 3)
+    positions = np.unique(np.concatenate(
+        [downsample_indices(x, np.asarray(values, dtype="float64"), share, method) for values in arrays]
+    ))
+    return x[positions], [np.asarray(values)[positions] for values in arrays]
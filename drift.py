@@ -0,0 +1,280 @@
+import os
+import json
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from scipy.special import kolmogorov
+from scipy.stats import chisquare
+from quantile_sketch import KLLSketch
+from cardinality_sketch import HeavyHitters
+
+# Reference CDF is kept at these quantiles; PSI uses the edges closest to its deciles
+CDF_QUANTILES = np.linspace(0, 1, 101)
+PSI_QUANTILES = np.linspace(0.1, 0.9, 9)
+PSI_EPSILON = 1e-4
+OTHER = "__other__"
+# Pearson's chi-square needs at least this many expected rows per bin; smaller bins are pooled
+MIN_EXPECTED = 5
+
+
+def _chunks(data):
+    return [data] if isinstance(data, pd.DataFrame) else data
+
+
+def _numeric_columns(df):
+    return df.select_dtypes(include=[np.number]).columns.tolist()
+
+
+def _categorical_columns(df):
+    return df.select_dtypes(include=["object", "string", "category", "bool", "boolean"]).columns.tolist()
+
+
+def psi(expected, actual):
+    """Population stability index between two arrays of bin proportions."""
+    expected = np.clip(np.asarray(expected, dtype="float64"), PSI_EPSILON, None)
+    actual = np.clip(np.asarray(actual, dtype="float64"), PSI_EPSILON, None)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+class ReferenceProfile:
+    """Compact, persistable summary of a baseline dataset for drift checks.
+
+    Numeric columns keep their CDF at 101 quantile edges (from a KLL sketch);
+    categorical columns keep the exact counts of their `max_categories` most
+    common values plus an exact "other" bucket. Misra-Gries only picks which
+    categories to keep, since its counts are lower bounds; the counts come
+    from a second pass, so chunked baselines must be re-iterable (a list of
+    chunks or a ChunkedSource). A column with no value frequent enough to
+    survive Misra-Gries (high cardinality or near uniform) is kept as
+    "untracked": it appears in drift reports with its missing rate only. Both
+    also keep row and missing counts. The profile is plain JSON.
+    """
+
+    def __init__(self, numeric=None, categorical=None):
+        self.numeric = numeric or {}
+        self.categorical = categorical or {}
+
+    @classmethod
+    def build(cls, data, max_categories=50, k=400):
+        """Profile a DataFrame or a re-iterable source of chunks."""
+        if iter(data) is data:
+            raise ValueError("Drift references need a re-iterable source, such as a list of chunks or a ChunkedSource")
+        sketches, heavy, rows, missing = {}, {}, {}, {}
+        for chunk in _chunks(data):
+            for col in _numeric_columns(chunk):
+                sketches.setdefault(col, KLLSketch(k, seed=0)).update(chunk[col])
+            for col in _categorical_columns(chunk):
+                counts = chunk[col].dropna().astype(str).value_counts()
+                heavy.setdefault(col, HeavyHitters(max_categories)).update_counts(counts)
+            for col in chunk.columns:
+                rows[col] = rows.get(col, 0) + len(chunk)
+                missing[col] = missing.get(col, 0) + int(chunk[col].isna().sum())
+
+        numeric = {}
+        for col, sketch in sketches.items():
+            if sketch.n == 0:
+                continue
+            edges = np.unique(sketch.quantiles(CDF_QUANTILES))
+            numeric[col] = {
+                "rows": rows[col], "missing": missing[col], "n": int(sketch.n),
+                "edges": edges.tolist(), "cdf": sketch.cdf(edges).tolist(),
+                "rank_error": sketch.rank_error(),
+            }
+        # Second pass: exact counts of the categories Misra-Gries picked
+        kept = {col: summary.top().index.astype(str) for col, summary in heavy.items()}
+        exact = {col: pd.Series(0, index=values, dtype="int64") for col, values in kept.items()}
+        for chunk in _chunks(data):
+            for col, values in kept.items():
+                if col in chunk.columns:
+                    counts = chunk[col].dropna().astype(str).value_counts()
+                    exact[col] += counts.reindex(values, fill_value=0).to_numpy()
+
+        categorical = {}
+        for col, counts in exact.items():
+            n = rows[col] - missing[col]
+            counts = {value: int(count) for value, count in counts.items()}
+            counts[OTHER] = n - sum(counts.values())
+            categorical[col] = {
+                "rows": rows[col], "missing": missing[col], "n": n, "counts": counts, "untracked": len(counts) == 1
+            }
+        return cls(numeric, categorical)
+
+    def to_dict(self):
+        return {"numeric": self.numeric, "categorical": self.categorical}
+
+    @classmethod
+    def from_dict(cls, payload):
+        return cls(payload.get("numeric"), payload.get("categorical"))
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+
+class DriftAccumulator:
+    """Counts of new data in the reference profile's bins and categories, built chunk by chunk.
+
+    Only counts are kept, so memory does not depend on how much data is
+    checked, and accumulators from different chunks or workers can be merged.
+    """
+
+    def __init__(self, reference, max_workers=None):
+        self.reference = reference
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.bins = {col: np.zeros(len(spec["edges"]) + 1, dtype=np.int64) for col, spec in reference.numeric.items()}
+        self.categories = {col: dict.fromkeys(spec["counts"], 0) for col, spec in reference.categorical.items()}
+        self.rows = dict.fromkeys(list(reference.numeric) + list(reference.categorical), 0)
+        self.missing = dict(self.rows)
+
+    def _count_numeric(self, col, series):
+        values = pd.to_numeric(series, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+        values = values[~np.isnan(values)]
+        # Bin i holds values in (edges[i-1], edges[i]], matching the reference CDF's "<= edge"
+        positions = np.searchsorted(self.reference.numeric[col]["edges"], values, side="left")
+        return np.bincount(positions, minlength=len(self.bins[col]))
+
+    def _count_categorical(self, col, series):
+        counts = series.dropna().astype(str).value_counts()
+        known = counts.index.isin(list(self.categories[col]))
+        result = {value: int(count) for value, count in counts[known].items()}
+        result[OTHER] = result.get(OTHER, 0) + int(counts[~known].sum())
+        return result
+
+    def update(self, chunk):
+        """Add one chunk's counts and return self; columns are counted in parallel."""
+        numeric = [col for col in self.bins if col in chunk.columns]
+        categorical = [col for col in self.categories if col in chunk.columns]
+        # numpy and pandas release the GIL while counting, so threads keep every core busy
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, max(len(numeric) + len(categorical), 1))) as executor:
+            numeric_counts = dict(zip(numeric, executor.map(lambda col: self._count_numeric(col, chunk[col]), numeric)))
+            categorical_counts = dict(zip(
+                categorical, executor.map(lambda col: self._count_categorical(col, chunk[col]), categorical)
+            ))
+        for col, counts in numeric_counts.items():
+            self.bins[col] += counts
+        for col, counts in categorical_counts.items():
+            for value, count in counts.items():
+                self.categories[col][value] += count
+        for col in numeric + categorical:
+            self.rows[col] += len(chunk)
+            self.missing[col] += int(chunk[col].isna().sum())
+        return self
+
+    def merge(self, other):
+        for col in self.bins:
+            self.bins[col] += other.bins[col]
+        for col, counts in self.categories.items():
+            for value in counts:
+                counts[value] += other.categories[col][value]
+        for col in self.rows:
+            self.rows[col] += other.rows[col]
+            self.missing[col] += other.missing[col]
+        return self
+
+    def _numeric_report(self, col):
+        spec = self.reference.numeric[col]
+        m = int(self.bins[col].sum())
+        if m == 0:
+            return None
+        ref_cdf = np.asarray(spec["cdf"])
+        new_cdf = np.cumsum(self.bins[col])[:-1] / m
+        # KS on the reference's quantile edges: exact there, so a slight underestimate in between
+        ks_stat = float(np.max(np.abs(new_cdf - ref_cdf)))
+        n = spec["n"]
+        # Differences within the reference sketch's rank error are not evidence of drift
+        tested = max(ks_stat - spec["rank_error"], 0.0)
+        p_value = float(kolmogorov(np.sqrt(n * m / (n + m)) * tested))
+        # With ties (discrete data) several deciles share an edge; keep each edge once
+        edges = np.unique(np.minimum(np.searchsorted(ref_cdf, PSI_QUANTILES), len(ref_cdf) - 1))
+        deciles = np.concatenate([[0.0], ref_cdf[edges], [1.0]])
+        new_deciles = np.concatenate([[0.0], new_cdf[edges], [1.0]])
+        return {
+            "type": "numeric",
+            "ks_stat": ks_stat,
+            "p_value": p_value,
+            "psi": psi(np.diff(deciles), np.diff(new_deciles)),
+            "reference_rank_error": spec["rank_error"],
+        }
+
+    def _categorical_report(self, col):
+        spec = self.reference.categorical[col]
+        if spec.get("untracked"):
+            # Every value fell into "other", so shares cannot shift; only the missing rate is compared
+            return {"type": "categorical", "status": "untracked (high cardinality)",
+                    "chi2_stat": np.nan, "p_value": np.nan, "psi": np.nan}
+        observed = pd.Series(self.categories[col], dtype="float64")
+        m = observed.sum()
+        if m == 0:
+            return None
+        shares = pd.Series(spec["counts"], dtype="float64").reindex(observed.index) / spec["n"]
+        stat, p_value = self._chisquare(observed, shares)
+        return {
+            "type": "categorical",
+            "chi2_stat": stat,
+            "p_value": p_value,
+            "psi": psi(shares.to_numpy(), (observed / m).to_numpy()),
+            "other_share": float(observed[OTHER] / m),
+            "reference_other_share": float(shares[OTHER]),
+        }
+
+    @staticmethod
+    def _chisquare(observed, shares):
+        """Chi-square goodness of fit against the reference shares, pooling bins expected below MIN_EXPECTED."""
+        # Values the baseline never had cannot be tested; PSI and other_share still show them
+        testable = shares > 0
+        observed, shares = observed[testable], shares[testable]
+        expected = shares / shares.sum() * observed.sum()
+        small = expected < MIN_EXPECTED
+        if small.any():
+            pooled_observed, pooled_expected = observed[small].sum(), expected[small].sum()
+            observed, expected = observed[~small], expected[~small]
+            if pooled_expected >= MIN_EXPECTED or observed.empty:
+                observed = pd.concat([observed, pd.Series([pooled_observed])], ignore_index=True)
+                expected = pd.concat([expected, pd.Series([pooled_expected])], ignore_index=True)
+            else:
+                # Still too small on its own: fold it into the smallest remaining bin
+                smallest = expected.idxmin()
+                observed[smallest] += pooled_observed
+                expected[smallest] += pooled_expected
+        if len(observed) < 2 or expected.min() < MIN_EXPECTED:
+            return np.nan, np.nan
+        stat, p_value = chisquare(observed.to_numpy(), expected.to_numpy())
+        return float(stat), float(p_value)
+
+    def report(self, alpha=0.05, psi_threshold=0.2):
+        """Per-column drift statistics; a column drifts when p < alpha and PSI > psi_threshold.
+
+        Both are required because on large data even negligible shifts are
+        statistically significant.
+        """
+        report = {}
+        for col in list(self.bins) + list(self.categories):
+            if self.rows[col] == 0:
+                continue
+            result = self._numeric_report(col) if col in self.bins else self._categorical_report(col)
+            if result is None:
+                continue
+            spec = self.reference.numeric.get(col) or self.reference.categorical[col]
+            result["missing_rate"] = self.missing[col] / self.rows[col]
+            result["reference_missing_rate"] = spec["missing"] / spec["rows"] if spec["rows"] else 0.0
+            # A NaN p-value (nothing testable) leaves the decision to PSI alone
+            significant = np.isnan(result["p_value"]) or result["p_value"] < alpha
+            result["drift"] = bool(significant and result["psi"] > psi_threshold)
+            report[col] = result
+        return report
+
+
+def detect_drift(reference, current, alpha=0.05, psi_threshold=0.2, max_workers=None):
+    """Drift report of `current` (a DataFrame or iterable of chunks) against a ReferenceProfile or baseline data."""
+    if not isinstance(reference, ReferenceProfile):
+        reference = ReferenceProfile.build(reference)
+    accumulator = DriftAccumulator(reference, max_workers)
+    for chunk in _chunks(current):
+        accumulator.update(chunk)
+    return accumulator.report(alpha, psi_threshold)
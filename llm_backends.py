@@ -0,0 +1,150 @@
+import json
+import time
+import asyncio
+import hashlib
+import openai
+import requests
+
+
+class LLMBackend:
+    """Interface every CoreModel LLM call goes through.
+
+    `messages` uses the OpenAI chat format. Subclasses implement chat and
+    stream_chat; achat defaults to running chat on a worker thread.
+    """
+
+    # Prefix for cache keys, so responses from different backends never mix
+    cache_namespace = ""
+
+    def chat(self, model, messages, max_tokens=None):
+        raise NotImplementedError
+
+    def stream_chat(self, model, messages, max_tokens=None):
+        raise NotImplementedError
+
+    async def achat(self, model, messages, max_tokens=None):
+        return await asyncio.to_thread(self.chat, model, messages, max_tokens)
+
+
+class OpenAIBackend(LLMBackend):
+    """Backend using the global `openai` module (the hosted OpenAI API)."""
+
+    def _params(self, model, messages, max_tokens):
+        params = {"model": model, "messages": messages}
+        if max_tokens is not None:
+            params["max_tokens"] = max_tokens
+        return params
+
+    def chat(self, model, messages, max_tokens=None):
+        response = openai.ChatCompletion.create(**self._params(model, messages, max_tokens))
+        return response['choices'][0]['message']['content']
+
+    def stream_chat(self, model, messages, max_tokens=None):
+        response = openai.ChatCompletion.create(stream=True, **self._params(model, messages, max_tokens))
+        for chunk in response:
+            delta = chunk['choices'][0].get('delta', {}).get('content')
+            if delta:
+                yield delta
+
+    async def achat(self, model, messages, max_tokens=None):
+        response = await openai.ChatCompletion.acreate(**self._params(model, messages, max_tokens))
+        return response['choices'][0]['message']['content']
+
+
+class OpenAICompatibleBackend(LLMBackend):
+    """Adapter for any OpenAI-compatible HTTP server (vLLM, llama.cpp, Ollama, LM Studio, ...)."""
+
+    def __init__(self, base_url, api_key=None, timeout=120):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+        if api_key:
+            self.session.headers["Authorization"] = f"Bearer {api_key}"
+        self.cache_namespace = f"{self.base_url}:"
+
+    def _post(self, model, messages, max_tokens, stream):
+        payload = {"model": model, "messages": messages, "stream": stream}
+        if max_tokens is not None:
+            payload["max_tokens"] = max_tokens
+        response = self.session.post(
+            f"{self.base_url}/chat/completions", json=payload, timeout=self.timeout, stream=stream
+        )
+        # HTTPError keeps the response, so the scheduler can retry on 429/5xx
+        response.raise_for_status()
+        return response
+
+    def chat(self, model, messages, max_tokens=None):
+        response = self._post(model, messages, max_tokens, stream=False)
+        return response.json()['choices'][0]['message']['content']
+
+    def stream_chat(self, model, messages, max_tokens=None):
+        with self._post(model, messages, max_tokens, stream=True) as response:
+            # Server-sent events: one "data: {...}" line per chunk, ending with "data: [DONE]"
+            for raw_line in response.iter_lines():
+                line = raw_line.decode("utf-8")
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                delta = json.loads(data)['choices'][0].get('delta', {}).get('content')
+                if delta:
+                    yield delta
+
+
+class StubBackend(LLMBackend):
+    """In-process backend with configurable latency and deterministic canned responses.
+
+    `responses` maps a substring of the user prompt to a canned answer, or is a
+    callable (model, messages) -> str. Anything unmatched gets a reply derived
+    from a hash of the prompt, so repeated runs are reproducible.
+    """
+
+    cache_namespace = "stub:"
+
+    def __init__(self, latency=0.05, time_to_first_token=0.01, responses=None):
+        self.latency = latency
+        self.time_to_first_token = min(time_to_first_token, latency)
+        self.responses = responses or {}
+        self.calls = 0
+
+    def _respond(self, model, messages):
+        self.calls += 1
+        prompt = messages[-1]["content"]
+        if callable(self.responses):
+            return self.responses(model, messages)
+        for needle, text in self.responses.items():
+            if needle in prompt:
+                return text
+        digest = hashlib.sha256(f"{model}\n{prompt}".encode("utf-8")).hexdigest()[:12]
+        return f"Stub analysis {digest} from {model} for a prompt of {len(prompt)} characters."
+
+    def chat(self, model, messages, max_tokens=None):
+        text = self._respond(model, messages)
+        time.sleep(self.latency)
+        return text
+
+    def stream_chat(self, model, messages, max_tokens=None):
+        words = self._respond(model, messages).split(" ")
+        time.sleep(self.time_to_first_token)
+        gap = (self.latency - self.time_to_first_token) / max(len(words) - 1, 1)
+        for i, word in enumerate(words):
+            if i:
+                time.sleep(gap)
+            yield word if i == len(words) - 1 else word + " "
+
+    async def achat(self, model, messages, max_tokens=None):
+        text = self._respond(model, messages)
+        await asyncio.sleep(self.latency)
+        return text
+
+
+def make_backend(spec=None, api_key=None):
+    """Build a backend from a spec: None/"openai", "stub", or an OpenAI-compatible base URL."""
+    if not spec or spec == "openai":
+        return OpenAIBackend()
+    if spec == "stub":
+        return StubBackend()
+    if spec.startswith(("http://", "https://")):
+        return OpenAICompatibleBackend(spec, api_key=api_key)
+    raise ValueError(f"Unknown LLM backend: {spec}")
@@ -0,0 +1,100 @@
+import os
+import time
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from dataset_digest import estimate_tokens
+
+# USD per 1K (prompt, completion) tokens, used for cost estimates only
+PRICING_PER_1K = {
+    "gpt-4": (0.03, 0.06),
+    "gpt-4o": (0.0025, 0.01),
+    "gpt-4o-mini": (0.00015, 0.0006),
+}
+
+
+def timed_completion(backend, model, system_role, prompt, max_tokens):
+    """Run one streaming chat completion through a backend and return its timings and output size."""
+    messages = [
+        {"role": "system", "content": system_role},
+        {"role": "user", "content": prompt}
+    ]
+    start = time.perf_counter()
+    first_token = None
+    parts = []
+    try:
+        for delta in backend.stream_chat(model, messages, max_tokens):
+            if first_token is None:
+                first_token = time.perf_counter()
+            parts.append(delta)
+    except Exception as e:
+        return {"ok": False, "error": str(e), "latency": time.perf_counter() - start}
+
+    end = time.perf_counter()
+    text = "".join(parts)
+    return {
+        "ok": True,
+        "latency": end - start,
+        "ttft": (first_token or end) - start,
+        "prompt_tokens": estimate_tokens(system_role) + estimate_tokens(prompt),
+        "completion_tokens": estimate_tokens(text),
+    }
+
+
+def summarize_runs(model, runs):
+    """Aggregate raw runs for one model into a benchmark table row."""
+    ok = [r for r in runs if r["ok"]]
+    row = {"model": model, "runs": len(runs), "error_rate": 1 - len(ok) / len(runs) if runs else 0.0}
+    if not ok:
+        return row
+    latency = np.array([r["latency"] for r in ok])
+    ttft = np.array([r["ttft"] for r in ok])
+    completion = np.array([r["completion_tokens"] for r in ok])
+    prompt = np.array([r["prompt_tokens"] for r in ok])
+    prompt_price, completion_price = PRICING_PER_1K.get(model, (np.nan, np.nan))
+    row.update({
+        "latency_p50": np.percentile(latency, 50),
+        "latency_p95": np.percentile(latency, 95),
+        "latency_p99": np.percentile(latency, 99),
+        "ttft_p50": np.percentile(ttft, 50),
+        "ttft_p95": np.percentile(ttft, 95),
+        "tokens_per_sec": completion.sum() / latency.sum() if latency.sum() else np.nan,
+        "est_cost_usd": (prompt.sum() * prompt_price + completion.sum() * completion_price) / 1000,
+    })
+    return row
+
+
+def run_benchmark(backend, models, system_role, prompt, max_tokens=500, repetitions=5, concurrency=1):
+    """Run `repetitions` calls per model, `concurrency` at a time, and return a results table.
+
+    Any LLMBackend works, including StubBackend or an OpenAICompatibleBackend
+    pointed at a local server, to measure pipeline overhead offline.
+    """
+    rows = []
+    for model in models:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            runs = list(executor.map(
+                lambda _: timed_completion(backend, model, system_role, prompt, max_tokens),
+                range(repetitions)
+            ))
+        rows.append(summarize_runs(model, runs))
+    return pd.DataFrame(rows).set_index("model")
+
+
+def log_benchmark_to_mlflow(results, params=None, run_name="llm_benchmark"):
+    """Log a benchmark table to MLflow as per-model metrics plus a CSV artifact."""
+    import mlflow
+
+    with mlflow.start_run(run_name=run_name):
+        if params:
+            mlflow.log_params(params)
+        for model, row in results.iterrows():
+            mlflow.log_metrics({
+                f"{model}_{metric}": float(value)
+                for metric, value in row.items() if pd.notna(value)
+            })
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            results_path = os.path.join(tmp_dir, "llm_benchmark.csv")
+            results.to_csv(results_path)
+            mlflow.log_artifact(results_path, "benchmarks")
@@ -0,0 +1,74 @@
+import os
+import json
+import time
+import hashlib
+from disk_cache import CacheDirectory
+
+
+class LLMCache:
+    """On-disk, content-addressed cache for LLM chat completions.
+
+    Entries older than `ttl_seconds` expire even if they keep being read;
+    least recently used ones are evicted past `max_size_mb` (see
+    disk_cache.CacheDirectory). A failed write is logged and the response
+    still returned.
+    """
+
+    def __init__(self, cache_dir=".llm_cache", max_size_mb=200, ttl_seconds=7 * 24 * 3600, enabled=True):
+        self.cache_dir = cache_dir
+        self.enabled = enabled
+        self.files = CacheDirectory(cache_dir, ".json", int(max_size_mb * 1024 * 1024), ttl_seconds)
+
+    @staticmethod
+    def make_key(model, system_role, prompt, max_tokens):
+        """Build the cache key from (model, system role, prompt hash, max_tokens)."""
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        payload = json.dumps([model, system_role, prompt_hash, max_tokens])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        # Shard by the first two hex characters to keep directories small
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key):
+        """Return the cached response for a key, or None on a miss."""
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            if not self.files.use(path):
+                self.files.count(hit=False)
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.files.count(hit=False)
+            return None
+        self.files.count(hit=True)
+        return entry["response"]
+
+    def set(self, key, response, **metadata):
+        """Store a response and evict old entries if the cache is over its limits."""
+        if not self.enabled:
+            return
+        entry = {"response": response, "created": time.time(), **metadata}
+
+        def write(tmp_path):
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+
+        self.files.write(self._path(key), write)
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones until under max size."""
+        self.files.evict()
+
+    def clear(self):
+        """Remove every cached response."""
+        self.files.clear()
+
+    def stats(self):
+        """Return hit/miss counters and current on-disk usage."""
+        stats = self.files.stats()
+        lookups = stats["hits"] + stats["misses"]
+        return {"enabled": self.enabled, **stats, "hit_rate": stats["hits"] / lookups if lookups else 0.0}
@@ -0,0 +1,149 @@
+import os
+import json
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+RETRYABLE_ERRORS = {"RateLimitError", "ServiceUnavailableError", "APIConnectionError", "Timeout", "TryAgain"}
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at `rate_per_minute`, holding at most a minute's worth."""
+
+    def __init__(self, rate_per_minute):
+        self.capacity = float(rate_per_minute)
+        self.rate = rate_per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, amount=1):
+        """Block until `amount` tokens are available, then take them."""
+        amount = min(amount, self.capacity)
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                delay = (amount - self.tokens) / self.rate
+            time.sleep(delay)
+
+
+def _status_code(error):
+    for attr in ("http_status", "status_code"):
+        status = getattr(error, attr, None)
+        if status is not None:
+            return status
+    return getattr(getattr(error, "response", None), "status_code", None)
+
+
+def is_retryable(error):
+    """True for rate-limit (429), server-side (5xx) and transient connection errors."""
+    status = _status_code(error)
+    if status is not None:
+        return status == 429 or 500 <= status < 600
+    return type(error).__name__ in RETRYABLE_ERRORS
+
+
+def _retry_after(error):
+    headers = getattr(error, "headers", None) or {}
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimitedScheduler:
+    """Run LLM calls under requests/min and tokens/min limits with bounded in-flight work.
+
+    Retryable failures (429/5xx) are retried with exponential backoff and jitter,
+    honouring a Retry-After header when the server sends one.
+    """
+
+    def __init__(self, requests_per_minute=60, tokens_per_minute=90_000, max_in_flight=8,
+                 max_retries=5, backoff_base=1.0, backoff_max=60.0):
+        self.request_bucket = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    def _call(self, fn, payload, tokens):
+        attempt = 0
+        while True:
+            if self.request_bucket:
+                self.request_bucket.acquire(1)
+            if self.token_bucket and tokens:
+                self.token_bucket.acquire(tokens)
+            try:
+                return fn(payload)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise
+                delay = _retry_after(e)
+                if delay is None:
+                    delay = min(self.backoff_max, self.backoff_base * 2 ** attempt) * random.uniform(0.5, 1.0)
+                attempt += 1
+                print(f"Retryable error ({e}); retry {attempt}/{self.max_retries} in {delay:.1f}s")
+                time.sleep(delay)
+
+    def run(self, tasks, fn, on_result, token_cost=0):
+        """Apply `fn` to each (task_id, payload) and hand results to `on_result(task_id, result)`.
+
+        Tasks are pulled lazily, so at most `max_in_flight` payloads are held at
+        once. `on_result` is always called from the calling thread. Returns a
+        list of (task_id, exception) for tasks that failed permanently.
+        """
+        failures = []
+        in_flight = {}
+
+        def drain(done):
+            for future in done:
+                task_id = in_flight.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    failures.append((task_id, e))
+                else:
+                    on_result(task_id, result)
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            for task_id, payload in tasks:
+                if len(in_flight) >= self.max_in_flight:
+                    drain(wait(in_flight, return_when=FIRST_COMPLETED).done)
+                tokens = token_cost(payload) if callable(token_cost) else token_cost
+                in_flight[executor.submit(self._call, fn, payload, tokens)] = task_id
+            drain(wait(in_flight).done)
+        return failures
+
+
+class JSONLSink:
+    """Append-only JSONL result file, flushed per record so progress survives crashes."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def completed_ids(self, key="chunk"):
+        """Ids of records already written without an error, for resuming a run."""
+        done = set()
+        if not os.path.exists(self.path):
+            return done
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # Partial line from a crash mid-write
+                if "error" not in record:
+                    done.add(record[key])
+        return done
+
+    def write(self, record):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
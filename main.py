@@ -1,23 +1,137 @@
 import os
 import json
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import openai
 from dataset_manager import DatasetManager
+from llm_cache import LLMCache
+from map_reduce import HierarchicalSummarizer
+from llm_scheduler import RateLimitedScheduler, JSONLSink
+from llm_benchmark import run_benchmark, log_benchmark_to_mlflow
+from llm_backends import OpenAIBackend, OpenAICompatibleBackend, make_backend
+from streaming_ingest import ChunkedSource
+from comoments import CoMoments
+from analysis_context import context_for
+from type_inference import columns_of_kind, DATETIME_KINDS
+from timeseries_engine import TimeSeriesEngine
+from sampling import sample_source
 
 # Core Model Class
 class CoreModel:
-    def __init__(self, api_key):
+    def __init__(self, api_key, use_cache=True, cache_dir=".llm_cache", max_concurrency=8, backend=None):
         self.api_key = api_key
         openai.api_key = api_key
         self.llm_name = "gpt-4"  # Default LLM
+        # Every LLM call goes through the backend (OpenAI, a local server, or the offline stub)
+        self.backend = backend or OpenAIBackend()
+        # Identical prompts are served from disk instead of re-sent to the LLM
+        self.cache = LLMCache(cache_dir=cache_dir, enabled=use_cache)
+        # Upper bound on LLM requests in flight at once for batched calls
+        self.max_concurrency = max_concurrency
+        # DataFrames are summarized into a digest of about this many tokens before prompting
+        self.digest_token_budget = 1500
+        # Sorts/resamples each date column once and decomposes its series on a process pool
+        self.timeseries_engine = TimeSeriesEngine()
+        # Rate limits applied to parallel chunk processing; adjust to the account's quota
+        self.scheduler = RateLimitedScheduler(max_in_flight=max_concurrency)
 
     def set_llm(self, llm_name):
         """Set the LLM to be used for analysis."""
         self.llm_name = llm_name
         print(f"LLM set to: {llm_name}")
 
-    def ingest_data(self, file_path):
-        """Ingest and validate diverse datasets."""
+    def _prompt_data(self, data):
+        """Replace a DataFrame with a token-budgeted digest; pass other data through."""
+        if isinstance(data, pd.DataFrame):
+            # Memoised per frame, so the several prompts about one dataset share a single digest
+            return context_for(data).digest(self.digest_token_budget)
+        return data
+
+    @staticmethod
+    def _messages(system_role, prompt):
+        return [
+            {"role": "system", "content": system_role},
+            {"role": "user", "content": prompt}
+        ]
+
+    def _cache_key(self, system_role, prompt, max_tokens, model):
+        return self.cache.make_key(self.backend.cache_namespace + model, system_role, prompt, max_tokens)
+
+    def _chat(self, system_role, prompt, max_tokens=None, model=None):
+        """Send a chat completion request, serving repeated prompts from the cache."""
+        model = model or self.llm_name
+        key = self._cache_key(system_role, prompt, max_tokens, model)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        content = self.backend.chat(model, self._messages(system_role, prompt), max_tokens)
+        self.cache.set(key, content, model=model)
+        return content
+
+    def _stream_chat(self, system_role, prompt, max_tokens=None, model=None):
+        """Yield the completion incrementally as tokens arrive; cache the full text at the end."""
+        model = model or self.llm_name
+        key = self._cache_key(system_role, prompt, max_tokens, model)
+        cached = self.cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+
+        parts = []
+        for delta in self.backend.stream_chat(model, self._messages(system_role, prompt), max_tokens):
+            parts.append(delta)
+            yield delta
+        self.cache.set(key, "".join(parts), model=model)
+
+    async def _achat(self, system_role, prompt, max_tokens=None, model=None):
+        """Async counterpart of _chat, sharing the same response cache."""
+        model = model or self.llm_name
+        key = self._cache_key(system_role, prompt, max_tokens, model)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        content = await self.backend.achat(model, self._messages(system_role, prompt), max_tokens)
+        self.cache.set(key, content, model=model)
+        return content
+
+    async def agather(self, calls, max_concurrency=None):
+        """Await LLM coroutines concurrently, keeping at most max_concurrency in flight.
+
+        `calls` is a dict or list of coroutines (e.g. from agenerate_insights);
+        results come back in the same shape.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+
+        async def bounded(coro):
+            async with semaphore:
+                return await coro
+
+        if isinstance(calls, dict):
+            results = await asyncio.gather(*(bounded(c) for c in calls.values()))
+            return dict(zip(calls.keys(), results))
+        return list(await asyncio.gather(*(bounded(c) for c in calls)))
+
+    def run_batch(self, calls, max_concurrency=None):
+        """Run independent LLM coroutines concurrently from synchronous code."""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.agather(calls, max_concurrency))
+        # Already inside an event loop (e.g. a notebook): run the batch on a helper thread
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, self.agather(calls, max_concurrency)).result()
+
+    def ingest_data(self, file_path, chunksize=None):
+        """Ingest and validate diverse datasets.
+
+        With `chunksize`, returns a ChunkedSource that streams typed chunks
+        instead of loading the whole file.
+        """
+        if chunksize:
+            return ChunkedSource(file_path, chunksize=chunksize)
         if file_path.endswith('.csv'):
             return pd.read_csv(file_path)
         elif file_path.endswith('.json'):
@@ -42,48 +156,176 @@ class CoreModel:
 
         return data
 
-    def perform_eda(self, data):
-        """Perform exploratory data analysis."""
+    def perform_eda(self, data, top_n=10):
+        """Perform exploratory data analysis.
+
+        Categorical columns report their distinct count and `top_n` most frequent
+        values rather than full value counts, which for ID-like columns can have
+        millions of entries.
+        """
         if isinstance(data, pd.DataFrame):
+            context = context_for(data)
+            object_cols = set(data.select_dtypes(include=['object']).columns)
+            column_profiles = {
+                col: p for col, p in context.column_profiles(top_n).items() if col in object_cols
+            }
             eda_results = {
-                "summary": data.describe().to_dict(),
-                "correlation_matrix": data.corr().to_dict(),
-                "value_counts": {
-                    col: data[col].value_counts().to_dict()
-                    for col in data.select_dtypes(include=['object']).columns
-                }
+                "summary": context.describe().to_dict(),
+                "correlation_matrix": context.correlation().to_dict(),
+                "value_counts": {col: p["top_values"] for col, p in column_profiles.items()},
+                "distinct_counts": {col: p["distinct"] for col, p in column_profiles.items()}
             }
         else:
             eda_results = "EDA not implemented for this format"
 
         return eda_results
 
-    def generate_insights(self, data, context="general"):
-        """Use LLM to generate insights."""
+    def _insights_request(self, data, context="general"):
         if context == "finance":
             system_role = "You are a financial data analyst. Your answers should reflect real-world financial markets, trading behavior, and securities data."
         else:
             system_role = "You are a data analyst."
-        response = openai.ChatCompletion.create(
-            model=self.llm_name,  # Use the dynamically set LLM
-            messages=[
-                {"role": "system", "content": system_role},
-                {"role": "user", "content": f"Analyze the following data: {data}"}
-            ],
-            max_tokens=1000  # Adjust token limit as needed
+        # Use the dynamically set LLM; adjust token limit as needed
+        return system_role, f"Analyze the following data: {self._prompt_data(data)}", 1000, self.llm_name
+
+    def generate_insights(self, data, context="general", stream=False):
+        """Use LLM to generate insights. With stream=True, returns a generator of text deltas."""
+        if stream:
+            return self._stream_chat(*self._insights_request(data, context))
+        return self._chat(*self._insights_request(data, context))
+
+    async def agenerate_insights(self, data, context="general"):
+        """Async variant of generate_insights."""
+        return await self._achat(*self._insights_request(data, context))
+
+    def _sections_request(self, questions, data=None):
+        listing = "\n".join(f'- "{key}": {question}' for key, question in questions.items())
+        prompt = (
+            "Answer each of the following questions about the same dataset. Respond with only a JSON object "
+            "whose keys are exactly the question ids below and whose values are your answers as plain-text strings.\n\n"
+            + listing
+        )
+        if data is not None:
+            prompt += f"\n\nDataset digest:\n{self._prompt_data(data)}"
+        return "You are a data analyst.", prompt, min(4000, 400 * len(questions)), self.llm_name
+
+    @staticmethod
+    def _split_sections(response, keys):
+        """Parse a packed JSON answer into {key: text}, keeping only the requested keys."""
+        start, end = response.find("{"), response.rfind("}")
+        if start == -1 or end <= start:
+            return {}
+        try:
+            parsed = json.loads(response[start:end + 1])
+        except ValueError:
+            return {}
+        if not isinstance(parsed, dict):
+            return {}
+        return {
+            key: value if isinstance(value, str) else json.dumps(value)
+            for key, value in parsed.items() if key in keys and value
+        }
+
+    def _section_fallback_prompt(self, question, data):
+        if data is None:
+            return question
+        return f"{question}\n\nDataset digest:\n{self._prompt_data(data)}"
+
+    def generate_sections(self, questions, data=None):
+        """Answer several questions about the same dataset in a single LLM request.
+
+        `questions` maps a section id to its question; returns {id: answer}.
+        Sections missing from an unparseable or partial response are fetched
+        with individual generate_insights calls instead.
+        """
+        sections = self._split_sections(self._chat(*self._sections_request(questions, data)), questions)
+        missing = {key: q for key, q in questions.items() if key not in sections}
+        if missing:
+            print(f"Packed response missing sections {list(missing)}; falling back to individual calls")
+            sections.update(self.run_batch({
+                key: self.agenerate_insights(self._section_fallback_prompt(q, data)) for key, q in missing.items()
+            }))
+        return {key: sections[key] for key in questions}
+
+    async def agenerate_sections(self, questions, data=None):
+        """Async variant of generate_sections."""
+        sections = self._split_sections(await self._achat(*self._sections_request(questions, data)), questions)
+        missing = {key: q for key, q in questions.items() if key not in sections}
+        if missing:
+            print(f"Packed response missing sections {list(missing)}; falling back to individual calls")
+            sections.update(await self.agather({
+                key: self.agenerate_insights(self._section_fallback_prompt(q, data)) for key, q in missing.items()
+            }))
+        return {key: sections[key] for key in questions}
+
+    def _merge_request(self, insights):
+        parts = "\n\n".join(f"[Part {i + 1}]\n{text}" for i, text in enumerate(insights))
+        prompt = (
+            f"The following {len(insights)} analyses each describe a consecutive slice of the same dataset. "
+            "Merge them into a single concise dataset-level analysis. Keep quantitative findings, "
+            "reconcile overlapping statements and call out patterns that differ between slices.\n\n" + parts
+        )
+        return "You are a data analyst.", prompt, 1000, self.llm_name
+
+    def merge_insights(self, insights):
+        """Use LLM to merge several partial insights into one."""
+        return self._chat(*self._merge_request(insights))
+
+    def _insights_token_cost(self, _payload=None):
+        # Upper bound per call: the prompt digest plus the completion limit of generate_insights
+        return self.digest_token_budget + 1000
+
+    def summarize_hierarchically(self, chunks, fan_in=10, checkpoint_path=None, parallel=False, config=None):
+        """Map each chunk to an insight, then merge them in a tree of reduce calls with the given fan-in."""
+        summarizer = HierarchicalSummarizer(
+            self.merge_insights, fan_in=fan_in, checkpoint_path=checkpoint_path,
+            scheduler=self.scheduler if parallel else None, token_cost=self._insights_token_cost(),
+            config=config
         )
-        return response.choices[0].message['content']
-
-    def benchmark_llm(self, data, model_versions):
-        """Compare LLM performance across versions."""
-        results = {}
-        for version in model_versions:
-            response = openai.completions.create(
-                model=version,
-                prompt=f"Analyze the following data: {data}",
-                max_tokens=500
-            )
-            results[version] = response.choices[0].text
+        return summarizer.run(chunks, self.generate_insights)
+
+    @staticmethod
+    def _output_path(file_path, suffix):
+        # Replace the extension rather than '.csv', so non-CSV inputs are never overwritten
+        return os.path.splitext(file_path)[0] + suffix
+
+    def _process_map_reduce(self, source, file_path, chunk_size, fan_in, suffix, parallel):
+        """Reduce chunk insights to a single dataset-level insight, resuming from any checkpoint."""
+        num_chunks = 0
+
+        def chunks():
+            nonlocal num_chunks
+            for chunk in source:
+                num_chunks += 1
+                yield chunk
+
+        checkpoint_file = self._output_path(file_path, f'{suffix}_checkpoint.jsonl')
+        insights, levels = self.summarize_hierarchically(
+            chunks(), fan_in=fan_in, checkpoint_path=checkpoint_file, parallel=parallel,
+            config={"chunk_size": chunk_size, "model": self.llm_name}
+        )
+        result = {"chunks": num_chunks, "levels": levels, "insights": insights}
+
+        insights_file = self._output_path(file_path, f'{suffix}_insights.json')
+        with open(insights_file, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"Map-reduce insights saved to {insights_file}")
+        return result
+
+    def benchmark_llm(self, data, model_versions, repetitions=1, concurrency=1, api_base=None, log_to_mlflow=False):
+        """Compare LLM latency, throughput, error rate and cost across versions.
+
+        Returns a table with one row per model. Runs through the configured
+        backend, or an OpenAI-compatible server at `api_base` if given; use
+        StubBackend to measure pipeline overhead offline.
+        """
+        backend = OpenAICompatibleBackend(api_base, api_key=self.api_key) if api_base else self.backend
+        results = run_benchmark(
+            backend, model_versions, "You are a data analyst.", f"Analyze the following data: {self._prompt_data(data)}",
+            max_tokens=500, repetitions=repetitions, concurrency=concurrency
+        )
+        if log_to_mlflow:
+            log_benchmark_to_mlflow(results, params={"repetitions": repetitions, "concurrency": concurrency})
         return results
 
     def process(self, file_path):
@@ -97,224 +339,180 @@ class CoreModel:
             "insights": insights
         }
 
-    def process_large_dataset(self, file_path, chunk_size=100):
-        """Process large datasets in chunks and generate insights."""
-        data = self.ingest_data(file_path)
-
-        if isinstance(data, pd.DataFrame):
-            num_chunks = (len(data) + chunk_size - 1) // chunk_size  # Calculate number of chunks
-            all_insights = []
-
-            for i in range(num_chunks):
-                chunk = data.iloc[i * chunk_size:(i + 1) * chunk_size]
-                chunk_insights = self.generate_insights(chunk.to_json())  # Convert chunk to JSON for LLM
-                all_insights.append({"chunk": i + 1, "insights": chunk_insights})
-
-            # Save combined insights to a file
-            insights_file = file_path.replace('.csv', '_insights.json')
-            with open(insights_file, 'w') as f:
-                json.dump(all_insights, f, indent=2)
-
-            print(f"Insights saved to {insights_file}")
-            return all_insights
-        else:
-            raise ValueError("Unsupported data format for large dataset processing")
-
-    def process_large_dataset_parallel(self, file_path, chunk_size=100):
-        """Process large datasets in parallel and generate insights."""
-        from concurrent.futures import ThreadPoolExecutor
-
-        data = self.ingest_data(file_path)
-
-        if isinstance(data, pd.DataFrame):
-            num_chunks = (len(data) + chunk_size - 1) // chunk_size  # Calculate number of chunks
-            all_insights = []
-
-            def process_chunk(chunk):
-                return self.generate_insights(chunk.to_json())
-
-            with ThreadPoolExecutor() as executor:
-                futures = [
-                    executor.submit(process_chunk, data.iloc[i * chunk_size:(i + 1) * chunk_size])
-                    for i in range(num_chunks)
-                ]
-
-                for i, future in enumerate(futures):
-                    all_insights.append({"chunk": i + 1, "insights": future.result()})
-
-            # Save combined insights to a file
-            insights_file = file_path.replace('.csv', '_parallel_insights.json')
-            with open(insights_file, 'w') as f:
-                json.dump(all_insights, f, indent=2)
+    def process_large_dataset(self, file_path, chunk_size=100, mode="chunks", fan_in=10):
+        """Process large datasets in chunks and generate insights.
+
+        mode="chunks" returns one insight per chunk; mode="map_reduce" merges them
+        into a single dataset-level insight. The file is streamed, so only one
+        chunk is held in memory at a time.
+        """
+        source = self.ingest_data(file_path, chunksize=chunk_size)
+
+        if mode == "map_reduce":
+            return self._process_map_reduce(source, file_path, chunk_size, fan_in, '_mapreduce', parallel=False)
+
+        all_insights = []
+        for i, chunk in enumerate(source):
+            chunk_insights = self.generate_insights(chunk)  # Chunk is digested for the LLM
+            all_insights.append({"chunk": i + 1, "insights": chunk_insights})
+
+        # Save combined insights to a file
+        insights_file = self._output_path(file_path, '_insights.json')
+        with open(insights_file, 'w') as f:
+            json.dump(all_insights, f, indent=2)
+
+        print(f"Insights saved to {insights_file}")
+        return all_insights
+
+    def process_large_dataset_parallel(self, file_path, chunk_size=100, mode="chunks", fan_in=10):
+        """Process large datasets in parallel, under the rate-limited scheduler, and generate insights.
+
+        In "chunks" mode each chunk's insight is appended to a JSONL file as soon
+        as it completes, and chunks already in that file are skipped on a rerun.
+        Returns a summary with the output path rather than the insights themselves.
+        Chunks are streamed from the file, so memory is bounded by the number of
+        calls in flight rather than the file size.
+        """
+        source = self.ingest_data(file_path, chunksize=chunk_size)
+
+        if mode == "map_reduce":
+            return self._process_map_reduce(source, file_path, chunk_size, fan_in, '_parallel_mapreduce', parallel=True)
+
+        insights_file = self._output_path(file_path, '_parallel_insights.jsonl')
+        sink = JSONLSink(insights_file)
+        done = sink.completed_ids()
+        num_chunks = 0
+
+        def tasks():
+            nonlocal num_chunks
+            for i, chunk in enumerate(source):
+                num_chunks = i + 1
+                if i + 1 not in done:
+                    yield i + 1, chunk
+
+        failures = self.scheduler.run(
+            tasks(), self.generate_insights,
+            on_result=lambda chunk_id, insights: sink.write({"chunk": chunk_id, "insights": insights}),
+            token_cost=self._insights_token_cost
+        )
+        for chunk_id, error in failures:
+            sink.write({"chunk": chunk_id, "error": str(error)})
 
-            print(f"Parallel insights saved to {insights_file}")
-            return all_insights
-        else:
-            raise ValueError("Unsupported data format for large dataset processing")
+        print(f"Parallel insights saved to {insights_file} ({len(failures)} failed chunks)")
+        return {
+            "output": insights_file,
+            "chunks": num_chunks,
+            "completed": num_chunks - len(failures),
+            "failed": len(failures)
+        }
 
-    def process_sample_based(self, file_path, sample_size=100):
-        """Process a sample of the dataset and dynamically generate code for further analysis."""
-        data = self.ingest_data(file_path)
+    def process_sample_based(self, file_path, sample_size=100, seed=0, stratify_by=None, chunksize=100_000):
+        """Process a sample of the dataset and dynamically generate code for further analysis.
 
-        if isinstance(data, pd.DataFrame):
-            sample = data.sample(n=min(sample_size, len(data)))
-            sample_insights = self.generate_insights(sample.to_json())
+        The sample is drawn in one streaming pass (uniform, or stratified by
+        the `stratify_by` column), so the full file is never loaded.
+        """
+        source = self.ingest_data(file_path, chunksize=chunksize)
+        sample = sample_source(source, sample_size, seed=seed, stratify_by=stratify_by)
+        if sample.empty:
+            raise ValueError("Unsupported data format for sample-based processing")
+        sample_insights = self.generate_insights(sample)
 
-            print("Sample insights:", sample_insights)
+        print("Sample insights:", sample_insights)
 
-            # Placeholder: Use LLM response to dynamically generate further analysis code
-            # For now, just return the sample insights
-            return sample_insights
-        else:
-            raise ValueError("Unsupported data format for sample-based processing")
+        # Placeholder: Use LLM response to dynamically generate further analysis code
+        # For now, just return the sample insights
+        return sample_insights
 
-    def generate_relationship_insights(self, json_data):
-        """Generate insights about relationships between selected features using LLM."""
+    def _relationship_request(self, json_data):
         prompt = (
             "Analyze the relationships between the selected features in the dataset. "
             "Provide insights about correlations, trends, and any notable patterns. "
-            "Here is the dataset in JSON format: " + json_data
+            "Here is the dataset in JSON format: " + self._prompt_data(json_data)
         )
+        return "You are a data analyst.", prompt, None, "gpt-4"
 
-        response = openai.ChatCompletion.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are a data analyst."},
-                {"role": "user", "content": prompt}
-            ]
-        )
+    def generate_relationship_insights(self, json_data, stream=False):
+        """Generate insights about relationships between selected features using LLM."""
+        if stream:
+            return self._stream_chat(*self._relationship_request(json_data))
+        return self._chat(*self._relationship_request(json_data))
 
-        return response['choices'][0]['message']['content']
+    async def agenerate_relationship_insights(self, json_data):
+        """Async variant of generate_relationship_insights."""
+        return await self._achat(*self._relationship_request(json_data))
 
     def generate_correlation_matrix(self, df):
-        """Generate a correlation matrix for the dataset."""
-        return df.corr()
+        """Generate a Pearson correlation matrix for a DataFrame or an iterable of chunks (e.g. a ChunkedSource).
 
-    def explain_feature_importance(self, json_data):
-        """Explain feature importance using LLM."""
+        Chunks are reduced to mergeable co-moments, so the result is exact in a single streamed pass.
+        """
+        if isinstance(df, pd.DataFrame):
+            return context_for(df).correlation()
+        return CoMoments.combine(CoMoments.from_frame(chunk) for chunk in df).corr()
+
+    def _feature_importance_request(self, json_data):
         prompt = (
             "Analyze the dataset and explain the importance of each feature. "
             "Provide insights into which features are most influential and why. "
-            "Here is the dataset in JSON format: " + json_data
-        )
-
-        response = openai.ChatCompletion.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are a data analyst."},
-                {"role": "user", "content": prompt}
-            ]
+            "Here is the dataset in JSON format: " + self._prompt_data(json_data)
         )
+        return "You are a data analyst.", prompt, None, "gpt-4"
 
-        return response['choices'][0]['message']['content']
-
-    def perform_time_series_analysis(self, df):
-        """Perform time series analysis on temporal data."""
-        import pandas as pd
-        from statsmodels.tsa.seasonal import seasonal_decompose
-        import numpy as np
-        
-        def find_date_columns(df):
-            date_cols = []
-            for col in df.columns:
-                if df[col].dtype == 'datetime64[ns]':
-                    date_cols.append(col)
-                elif isinstance(df[col].dtype, object):
-                    # Try to parse as datetime
-                    try:
-                        pd.to_datetime(df[col])
-                        date_cols.append(col)
-                    except:
-                        continue
-            return date_cols
-
-        date_columns = find_date_columns(df)
+    def explain_feature_importance(self, json_data, stream=False):
+        """Explain feature importance using LLM."""
+        if stream:
+            return self._stream_chat(*self._feature_importance_request(json_data))
+        return self._chat(*self._feature_importance_request(json_data))
+
+    async def aexplain_feature_importance(self, json_data):
+        """Async variant of explain_feature_importance."""
+        return await self._achat(*self._feature_importance_request(json_data))
+
+    def perform_time_series_analysis(self, df, type_map=None, max_points=None):
+        """Perform time series analysis on temporal data.
+
+        Date columns come from `type_map` (see type_inference.infer_types) when
+        the caller already has one, otherwise from the frame's analysis context.
+        Returns {"<numeric>_vs_<date>": decomposition} with array-valued
+        components, downsampled to about `max_points` (LTTB) if given.
+        """
+        if type_map is None:
+            type_map = context_for(df).type_map()
+        date_columns = [col for col in columns_of_kind(type_map, DATETIME_KINDS) if col in df.columns]
         if not date_columns:
             return None
+        return self.timeseries_engine.analyze(df, date_columns, max_points=max_points)
 
-        results = {}
-        for date_col in date_columns:
-            # Convert to datetime if not already
-            df[date_col] = pd.to_datetime(df[date_col])
-            # Drop rows with NaT in the datetime column
-            df = df.dropna(subset=[date_col])
-            # Find numeric columns for analysis
-            numeric_cols = df.select_dtypes(include=[np.number]).columns
-            for num_col in numeric_cols:
-                if len(df) >= 2:  # Need at least 2 points for analysis
-                    # Sort by date
-                    ts_data = df.sort_values(date_col)[[date_col, num_col]].set_index(date_col)
-                    # Remove missing values
-                    ts_data = ts_data.dropna()
-                    # Resample to regular intervals if needed
-                    if ts_data.index.inferred_freq is None:
-                        # Determine appropriate frequency
-                        date_min = ts_data.index.min()
-                        date_max = ts_data.index.max()
-                        # Check for NaT before proceeding
-                        if pd.isna(date_min) or pd.isna(date_max):
-                            continue  # Skip this time series
-                        date_range = date_max - date_min
-                        if date_range.days > 365*2:
-                            freq = 'M'  # Monthly
-                        elif date_range.days > 30:
-                            freq = 'D'  # Daily
-                        else:
-                            freq = 'H'  # Hourly
-                        ts_data = ts_data.resample(freq).mean()
-                    # Remove missing values again after resampling
-                    ts_data = ts_data.dropna()
-                    if len(ts_data) >= 2:  # Check again after cleaning
-                        try:
-                            # Perform seasonal decomposition
-                            decomposition = seasonal_decompose(ts_data, period=min(len(ts_data)//2, 12))
-                            results[f"{num_col}_vs_{date_col}"] = {
-                                "trend": decomposition.trend.dropna().tolist(),
-                                "seasonal": decomposition.seasonal.dropna().tolist(),
-                                "resid": decomposition.resid.dropna().tolist(),
-                                "frequency": ts_data.index.inferred_freq,
-                                "data_points": len(ts_data)
-                            }
-                        except Exception as e:
-                            continue
-        
-        return results
-
-    def suggest_target_and_models(self, df):
-        """Suggest target columns and suitable ML models based on the dataset."""
-        import json
-        stats_json = df.describe(include='all').to_json(date_format='iso')
-        schema = df.dtypes.apply(str).to_dict()
-
+    def _target_and_models_request(self, df):
         prompt = f"""
 You are a machine learning expert.
 
-Given the following dataset schema and summary statistics, please:
+Given the following dataset digest (schema, summary statistics, correlations and sample rows), please:
 
 1. Suggest the most likely target variable(s) (i.e., what could be predicted).
 2. Recommend appropriate types of machine learning models (classification, regression, clustering, etc.) based on the data characteristics.
 3. Provide reasoning behind your suggestions.
 
-Schema:
-{json.dumps(schema)}
-
-Statistics:
-{stats_json}
+Dataset digest:
+{self._prompt_data(df)}
 """
-        response = openai.ChatCompletion.create(
-            model=self.llm_name,
-            messages=[
-                {"role": "system", "content": "You are a senior machine learning expert."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=800
-        )
-        return response['choices'][0]['message']['content']
+        return "You are a senior machine learning expert.", prompt, 800, self.llm_name
+
+    def suggest_target_and_models(self, df, stream=False):
+        """Suggest target columns and suitable ML models based on the dataset."""
+        if stream:
+            return self._stream_chat(*self._target_and_models_request(df))
+        return self._chat(*self._target_and_models_request(df))
+
+    async def asuggest_target_and_models(self, df):
+        """Async variant of suggest_target_and_models."""
+        return await self._achat(*self._target_and_models_request(df))
 
 # Example usage
 if __name__ == "__main__":
     api_key = os.getenv("OPENAI_API_KEY")
-    core_model = CoreModel(api_key)
+    core_model = CoreModel(api_key, backend=make_backend(os.getenv("CORE_MODEL_BACKEND"), api_key))
 
     # Initialize DatasetManager
     manager = DatasetManager()
@@ -341,7 +539,7 @@ if __name__ == "__main__":
 
     for dataset in datasets:
         file_path = manager.download_dataset(dataset['url'], dataset['name'], dataset['file'])
-        df = manager.load_dataset(file_path)
+        df = manager.load_dataset(file_path, dataset_name=dataset['name'])
         manager.generate_plots(df, os.path.join(manager.base_folder, dataset['name'], 'plots'))
 
         # Generate dataset profile
@@ -0,0 +1,100 @@
+import os
+import json
+import threading
+
+
+class HierarchicalSummarizer:
+    """Map chunks to insights, then merge them in a tree of reduce calls.
+
+    Level 0 holds one output per chunk; each higher level merges groups of
+    `fan_in` outputs from the level below until a single insight remains.
+    Every finished item is appended to a JSONL checkpoint, so an interrupted
+    run resumes where it stopped instead of restarting. Items run one at a
+    time unless a RateLimitedScheduler is given.
+    """
+
+    def __init__(self, reduce_fn, fan_in=10, checkpoint_path=None, scheduler=None, token_cost=0, config=None):
+        if fan_in < 2:
+            raise ValueError("fan_in must be at least 2")
+        self.reduce_fn = reduce_fn
+        self.fan_in = fan_in
+        self.checkpoint_path = checkpoint_path
+        self.scheduler = scheduler
+        self.token_cost = token_cost
+        self.config = dict(config or {}, fan_in=fan_in)
+        self._lock = threading.Lock()
+        self.done = self._load_checkpoint()
+
+    def _load_checkpoint(self):
+        """Return {(level, index): text} for items finished by a previous run."""
+        done = {}
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return done
+        with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # Partial line from a crash mid-write
+                if "config" in record:
+                    if record["config"] != self.config:
+                        raise ValueError(
+                            f"Checkpoint {self.checkpoint_path} was written with {record['config']}, "
+                            f"not {self.config}; delete it to start over"
+                        )
+                    continue
+                done[(record["level"], record["index"])] = record["text"]
+        if done:
+            print(f"Resuming from {len(done)} checkpointed items in {self.checkpoint_path}")
+        return done
+
+    def _record(self, level, index, text):
+        with self._lock:
+            self.done[(level, index)] = text
+            if not self.checkpoint_path:
+                return
+            is_new = not os.path.exists(self.checkpoint_path)
+            with open(self.checkpoint_path, 'a', encoding='utf-8') as f:
+                if is_new:
+                    f.write(json.dumps({"config": self.config}) + "\n")
+                f.write(json.dumps({"level": level, "index": index, "text": text}) + "\n")
+
+    def _run_level(self, level, fn, items):
+        """Apply fn to each (index, arg) that is not yet checkpointed for this level."""
+        pending = ((index, arg) for index, arg in items if (level, index) not in self.done)
+
+        if self.scheduler is None:
+            for index, arg in pending:
+                self._record(level, index, fn(arg))
+            return
+        failures = self.scheduler.run(
+            pending, fn, lambda index, text: self._record(level, index, text), token_cost=self.token_cost
+        )
+        if failures:
+            index, error = failures[0]
+            raise RuntimeError(f"{len(failures)} item(s) failed at level {level}, e.g. item {index}: {error}")
+
+    def run(self, chunks, map_fn):
+        """Map every chunk, reduce level by level and return (final insight, depth)."""
+        count = 0
+
+        def items():
+            nonlocal count
+            for index, chunk in enumerate(chunks):
+                count = index + 1
+                yield index, chunk
+
+        self._run_level(0, map_fn, items())
+        if count == 0:
+            raise ValueError("No chunks to summarize")
+
+        level = 0
+        while count > 1:
+            groups = [
+                [self.done[(level, i)] for i in range(start, min(start + self.fan_in, count))]
+                for start in range(0, count, self.fan_in)
+            ]
+            level += 1
+            self._run_level(level, self.reduce_fn, enumerate(groups))
+            count = len(groups)
+        return self.done[(level, 0)], level
@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+
+# Identity values, so a column missing from one side of a merge contributes nothing
+_EMPTY = {"n": 0.0, "mean": 0.0, "M2": 0.0, "M3": 0.0, "M4": 0.0, "min": np.inf, "max": -np.inf}
+
+
+class Moments:
+    """Mergeable per-column count, mean, central moment sums (M2, M3, M4), min and max.
+
+    Built from a chunk in one vectorised pass, and combined exactly across
+    chunks or worker processes with the pairwise update of Chan et al. and
+    Pébay, so `describe()` matches pandas on the full data whatever the split.
+    Missing values are skipped.
+    """
+
+    def __init__(self, table=None):
+        self.table = table if table is not None else pd.DataFrame(columns=list(_EMPTY), dtype="float64")
+
+    @classmethod
+    def from_frame(cls, df):
+        """Moments of every numeric column of a DataFrame (or a Series)."""
+        if isinstance(df, pd.Series):
+            df = df.to_frame()
+        numeric = df.select_dtypes(include=[np.number])
+        values = numeric.to_numpy(dtype="float64", na_value=np.nan)
+        n = np.sum(~np.isnan(values), axis=0).astype("float64")
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.nansum(values, axis=0) / n
+            deviation = values - mean
+            squared = deviation ** 2
+            table = pd.DataFrame({
+                "n": n,
+                "mean": np.where(n > 0, mean, 0.0),
+                "M2": np.nansum(squared, axis=0),
+                "M3": np.nansum(squared * deviation, axis=0),
+                "M4": np.nansum(squared ** 2, axis=0),
+                "min": np.where(n > 0, np.min(values, axis=0, initial=np.inf, where=~np.isnan(values)), np.inf),
+                "max": np.where(n > 0, np.max(values, axis=0, initial=-np.inf, where=~np.isnan(values)), -np.inf),
+            }, index=numeric.columns)
+        return cls(table)
+
+    def merge(self, other):
+        """Return the moments of the union of both inputs' data."""
+        columns = self.table.index.union(other.table.index, sort=False)
+        a = self.table.reindex(columns).fillna(_EMPTY)
+        b = other.table.reindex(columns).fillna(_EMPTY)
+        na, nb = a["n"], b["n"]
+        n = na + nb
+        with np.errstate(invalid="ignore", divide="ignore"):
+            delta = b["mean"] - a["mean"]
+            delta_n = (delta / n).fillna(0.0)
+            table = pd.DataFrame({
+                "n": n,
+                "mean": a["mean"] + delta_n * nb,
+                "M2": a["M2"] + b["M2"] + delta * delta_n * na * nb,
+                "M3": a["M3"] + b["M3"] + delta * delta_n ** 2 * na * nb * (na - nb)
+                      + 3 * delta_n * (na * b["M2"] - nb * a["M2"]),
+                "M4": a["M4"] + b["M4"] + delta * delta_n ** 3 * na * nb * (na * na - na * nb + nb * nb)
+                      + 6 * delta_n ** 2 * (na * na * b["M2"] + nb * nb * a["M2"])
+                      + 4 * delta_n * (na * b["M3"] - nb * a["M3"]),
+                "min": np.minimum(a["min"], b["min"]),
+                "max": np.maximum(a["max"], b["max"]),
+            })
+        return Moments(table)
+
+    def update(self, df):
+        """Fold another chunk into these moments in place and return self."""
+        self.table = self.merge(Moments.from_frame(df)).table
+        return self
+
+    @classmethod
+    def combine(cls, parts):
+        """Merge an iterable of Moments, e.g. one per chunk."""
+        total = cls()
+        for part in parts:
+            total = total.merge(part)
+        return total
+
+    def describe(self):
+        """Per-column count, mean, std, skew, kurt, min and max, with pandas' sample (bias-corrected) definitions."""
+        t = self.table
+        n = t["n"]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            variance = t["M2"] / (n - 1)
+            # pandas reports zero skew/kurtosis for constant columns instead of 0/0
+            flat = t["M2"] <= 1e-14 * np.maximum(t["mean"] ** 2, 1.0) * n
+            m2, m3, m4 = t["M2"] / n, t["M3"] / n, t["M4"] / n
+            skew = np.sqrt(n * (n - 1)) / (n - 2) * m3 / m2 ** 1.5
+            kurt = (n - 1) / ((n - 2) * (n - 3)) * ((n + 1) * (m4 / m2 ** 2 - 3) + 6)
+        result = pd.DataFrame({
+            "count": n,
+            "mean": t["mean"].where(n > 0),
+            "std": np.sqrt(variance).where(n > 1),
+            "min": t["min"].where(n > 0),
+            "max": t["max"].where(n > 0),
+            "skew": skew.mask(flat, 0.0).where(n > 2),
+            "kurt": kurt.mask(flat, 0.0).where(n > 3),
+        })
+        return result.T
@@ -0,0 +1,272 @@
+import os
+import io
+import json
+import pickle
+import hashlib
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from disk_cache import CacheDirectory
+
+
+def _histogram(ax, data, params):
+    import seaborn as sns
+    sns.histplot(data.dropna(), kde=params.get("kde", True), bins=params.get("bins", "auto"),
+                 color=params.get("color"), ax=ax)
+
+
+def _heatmap(ax, data, params):
+    import seaborn as sns
+    sns.heatmap(data, annot=params.get("annot", True), cmap=params.get("cmap", "coolwarm"),
+                fmt=params.get("fmt", ".2g"), ax=ax)
+
+
+def _line(ax, data, params):
+    ax.plot(data.index, data.to_numpy())
+
+
+def _density_pairplot(grid, params):
+    """Pairplot of a DensityGrid: 1D histograms on the diagonal, log-scaled 2D bin counts elsewhere."""
+    from matplotlib.colors import LogNorm
+
+    columns = grid.columns
+    size = len(columns)
+    figure = _figure((2.5 * size, 2.5 * size))
+    axes = figure.subplots(size, size, squeeze=False)
+    for i, y in enumerate(columns):
+        for j, x in enumerate(columns):
+            ax = axes[i, j]
+            if i == j:
+                ax.stairs(grid.counts[x], grid.edges[x], fill=True)
+            else:
+                counts = grid.pair_counts[(x, y)] if (x, y) in grid.pair_counts else grid.pair_counts[(y, x)].T
+                counts = np.ma.masked_equal(counts, 0)  # empty bins stay blank
+                if counts.count():
+                    ax.pcolormesh(grid.edges[x], grid.edges[y], counts.T, norm=LogNorm(),
+                                  cmap=params.get("cmap", "viridis"))
+            if i == size - 1:
+                ax.set_xlabel(x)
+            if j == 0:
+                ax.set_ylabel(y)
+    figure.suptitle(params.get("title", f"Binned pairplot of {grid.rows:,} rows"))
+    figure.tight_layout()
+    return figure
+
+
+def _pairplot(data, params):
+    """Scatter matrix of the numeric columns with histograms on the diagonal, like seaborn's pairplot."""
+    import seaborn as sns
+
+    columns = data.select_dtypes(include=[np.number]).columns
+    size = len(columns)
+    if not size:
+        raise ValueError("A pairplot needs at least one numeric column")
+    figure = _figure((2.5 * size, 2.5 * size))
+    axes = figure.subplots(size, size, squeeze=False)
+    for i, y in enumerate(columns):
+        for j, x in enumerate(columns):
+            ax = axes[i, j]
+            if i == j:
+                sns.histplot(data[x].dropna(), ax=ax)
+            else:
+                sns.scatterplot(x=data[x], y=data[y], ax=ax)
+            ax.set_xlabel(x if i == size - 1 else "")
+            ax.set_ylabel(y if j == 0 else "")
+    figure.tight_layout()
+    return figure
+
+
+def _figure(figsize):
+    # A figure on its own Agg canvas: pyplot and the caller's backend are never touched
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    figure = Figure(figsize=figsize)
+    FigureCanvasAgg(figure)
+    return figure
+
+
+# Plot kind -> function drawing `data` onto a single axes
+RENDERERS = {
+    "histogram": _histogram,
+    "heatmap": _heatmap,
+    "line": _line,
+}
+
+
+def _render(kind, data, params):
+    """Draw one figure and return it as PNG bytes; runs in a worker process or the calling thread."""
+    if kind == "pairplot":
+        figure = _pairplot(data, params)
+    elif kind == "density_pairplot":
+        figure = _density_pairplot(data, params)
+    elif kind in RENDERERS:
+        figure = _figure(params.get("figsize", (6.4, 4.8)))
+        ax = figure.subplots()
+        RENDERERS[kind](ax, data, params)
+        for setter in ("title", "xlabel", "ylabel"):
+            if setter in params:
+                getattr(ax, f"set_{setter}")(params[setter])
+    else:
+        raise ValueError(f"Unknown plot kind: {kind}")
+
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format="png")
+    return buffer.getvalue()
+
+
+def plot_fingerprint(kind, data, params):
+    """Hash of the plotted data, plot kind and parameters."""
+    digest = hashlib.sha256()
+    digest.update(kind.encode("utf-8"))
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode("utf-8"))
+    if isinstance(data, pd.DataFrame):
+        digest.update(json.dumps([str(col) for col in data.columns]).encode("utf-8"))
+    elif isinstance(data, pd.Series):
+        digest.update(str(data.name).encode("utf-8"))
+    else:
+        # Pre-aggregated data such as a DensityGrid is small; hash its pickled state
+        digest.update(pickle.dumps(data))
+        return digest.hexdigest()
+    digest.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class PlotService:
+    """Renders figures on a headless backend, in parallel, with results cached by fingerprint.
+
+    A job is `(kind, data, params, path)`: `data` is the Series or DataFrame to
+    plot (a DensityGrid for "density_pairplot"), `params` the plot options and `path` where to write the PNG (or
+    None). Each figure is keyed by a hash of its data, kind and params; a
+    figure seen before is served from memory or from `cache_dir` without
+    rendering. New figures are drawn on Agg canvases of their own, on a
+    process pool that is started on first use and kept for the life of the
+    service; workers come from a forkserver, since the caller may be running
+    other threads. One service can be shared between threads (e.g. Streamlit
+    sessions).
+    Least recently used PNGs are evicted once `cache_dir` grows past
+    `max_size_mb`. `image(path)` returns the in-memory PNG of any file the
+    service wrote.
+    """
+
+    def __init__(self, cache_dir=os.path.join("datasets", ".plot_cache"), max_workers=None, max_memory_items=256,
+                 max_size_mb=256):
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_memory_items = max_memory_items
+        self.files = CacheDirectory(cache_dir, ".png", int(max_size_mb * 1024 * 1024))
+        self._executor = None
+        self._lock = threading.Lock()
+        self._images = OrderedDict()  # fingerprint -> PNG bytes, least recently used first
+        self._paths = {}  # written path -> fingerprint
+        self.rendered = 0
+        self.hits = 0
+
+    def _cache_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.png")
+
+    def _pool(self):
+        # Worker start-up costs more than most figures, so one pool serves every batch
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context("forkserver")
+                )
+            return self._executor
+
+    def _remember(self, key, image):
+        with self._lock:
+            self._images[key] = image
+            self._images.move_to_end(key)
+            while len(self._images) > self.max_memory_items:
+                self._images.popitem(last=False)
+
+    def _cached(self, key):
+        with self._lock:
+            if key in self._images:
+                self._images.move_to_end(key)
+                return self._images[key]
+        cache_path = self._cache_path(key)
+        if not self.files.use(cache_path):
+            return None
+        try:
+            with open(cache_path, "rb") as f:
+                image = f.read()
+        except OSError:
+            return None
+        self._remember(key, image)
+        return image
+
+    def _store(self, key, image):
+        self._remember(key, image)
+
+        def write(tmp_path):
+            with open(tmp_path, "wb") as f:
+                f.write(image)
+
+        self.files.write(self._cache_path(key), write)
+
+    def render_many(self, jobs):
+        """Render a list of jobs and return their PNG bytes, in job order."""
+        jobs = list(jobs)
+        keys = [plot_fingerprint(kind, data, params) for kind, data, params, _ in jobs]
+        images = [self._cached(key) for key in keys]
+        todo = {}
+        for position, (key, image) in enumerate(zip(keys, images)):
+            if image is None:
+                todo.setdefault(key, position)  # identical figures in one batch render once
+            else:
+                self.hits += 1
+
+        if len(todo) > 1 and self.max_workers > 1:
+            executor = self._pool()
+            futures = {key: executor.submit(_render, *jobs[position][:3]) for key, position in todo.items()}
+            fresh = {key: future.result() for key, future in futures.items()}
+        else:
+            fresh = {key: _render(*jobs[position][:3]) for key, position in todo.items()}
+        for key, image in fresh.items():
+            self._store(key, image)
+        self.rendered += len(fresh)
+
+        images = [image if image is not None else fresh[key] for key, image in zip(keys, images)]
+        for (_, _, _, path), key, image in zip(jobs, keys, images):
+            if path:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                with open(path, "wb") as f:
+                    f.write(image)
+                self._paths[os.path.abspath(path)] = key
+        return images
+
+    def render(self, kind, data, params=None, path=None):
+        """Render a single figure and return its PNG bytes."""
+        return self.render_many([(kind, data, params or {}, path)])[0]
+
+    def image(self, path):
+        """In-memory PNG buffer for a file written by this service (read from disk for other files)."""
+        key = self._paths.get(os.path.abspath(path))
+        image = self._cached(key) if key else None
+        if image is None:
+            with open(path, "rb") as f:
+                image = f.read()
+        return io.BytesIO(image)
+
+    def evict(self):
+        """Drop least recently used figures from disk until the cache is under max size."""
+        self.files.evict()
+
+    def clear(self):
+        """Drop every cached figure."""
+        with self._lock:
+            self._images.clear()
+            self._paths.clear()
+        self.files.clear()
+
+    def close(self):
+        """Shut down the worker pool; it is started again on the next parallel batch."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
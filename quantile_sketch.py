@@ -0,0 +1,152 @@
+import numpy as np
+import pandas as pd
+
+# Above this many rows, quantiles come from sketches instead of a full sort
+SKETCH_THRESHOLD = 1_000_000
+
+
+class KLLSketch:
+    """Mergeable streaming quantile sketch (Karnin, Lang & Liberty) for one numeric column.
+
+    Holds O(k) values in a stack of compactors: when a level fills up it is
+    sorted and every other value (from a random offset) is promoted with
+    double weight. Until the first compaction every value is kept, so results
+    are exact. Sketches built from different chunks or processes merge into
+    one with the same error guarantee.
+    """
+
+    def __init__(self, k=200, seed=None):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self.n = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self.rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        # Lower levels get geometrically smaller capacities, with the top level holding k
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    @property
+    def is_exact(self):
+        return len(self.levels) == 1
+
+    def update(self, values):
+        """Add an array-like of values; missing values are ignored."""
+        values = np.asarray(pd.to_numeric(pd.Series(values), errors="coerce").dropna(), dtype="float64")
+        if not len(values):
+            return self
+        self.n += len(values)
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """Fold another sketch into this one in place and return self."""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _compress(self):
+        while sum(len(items) for items in self.levels) > sum(self._capacity(h) for h in range(len(self.levels))):
+            level = next(h for h, items in enumerate(self.levels) if len(items) >= self._capacity(h))
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            items = np.sort(self.levels[level])
+            # An odd item out stays behind, so total weight is preserved exactly
+            keep = items[-1:] if len(items) % 2 else items[:0]
+            pairs = items[:len(items) - len(keep)]
+            promoted = pairs[self.rng.integers(2)::2]
+            self.levels[level] = keep
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+
+    def rank_error(self):
+        """Normalized rank error bound (~99% confidence); 0 while the sketch is exact."""
+        if self.is_exact:
+            return 0.0
+        # Empirical constants from the Apache DataSketches KLL implementation
+        return 2.296 / self.k ** 0.9723
+
+    def quantiles(self, qs):
+        """Approximate quantiles for an array-like of probabilities in [0, 1]."""
+        qs = np.atleast_1d(np.asarray(qs, dtype="float64"))
+        if self.n == 0:
+            return np.full(len(qs), np.nan)
+        if self.is_exact:
+            # Same linear interpolation as pandas
+            return np.quantile(self.levels[0], qs)
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2.0 ** h) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        items, cumulative = items[order], np.cumsum(weights[order])
+        positions = np.searchsorted(cumulative, qs * cumulative[-1], side="left")
+        result = items[np.minimum(positions, len(items) - 1)]
+        # The extremes are tracked exactly
+        result[qs <= 0] = self.min
+        result[qs >= 1] = self.max
+        return result
+
+    def quantile(self, q):
+        return float(self.quantiles([q])[0])
+
+    def cdf(self, values):
+        """Approximate fraction of the data <= each of an array-like of values."""
+        values = np.atleast_1d(np.asarray(values, dtype="float64"))
+        if self.n == 0:
+            return np.full(len(values), np.nan)
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2.0 ** h) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        items, cumulative = items[order], np.cumsum(weights[order])
+        positions = np.searchsorted(items, values, side="right")
+        return np.where(positions > 0, cumulative[np.maximum(positions - 1, 0)], 0.0) / cumulative[-1]
+
+
+def sketch_frame(df, k=200, sketches=None):
+    """Update (or create) one KLLSketch per numeric column of a chunk and return them."""
+    sketches = {} if sketches is None else sketches
+    for col in df.select_dtypes(include=[np.number]).columns:
+        sketches.setdefault(col, KLLSketch(k)).update(df[col])
+    return sketches
+
+
+def merge_sketches(parts):
+    """Merge an iterable of {column: KLLSketch} dicts, e.g. one per chunk."""
+    merged = {}
+    for part in parts:
+        for col, sketch in part.items():
+            if col in merged:
+                merged[col].merge(sketch)
+            else:
+                merged[col] = sketch
+    return merged
+
+
+def sketch_quantiles(sketches, qs):
+    """Quantiles from per-column sketches: (DataFrame indexed by q, {column: rank error})."""
+    table = pd.DataFrame({col: sketch.quantiles(qs) for col, sketch in sketches.items()}, index=list(qs))
+    return table, {col: sketch.rank_error() for col, sketch in sketches.items()}
+
+
+def column_quantiles(df, qs, threshold=SKETCH_THRESHOLD, k=200):
+    """Quantiles of every numeric column: exact up to `threshold` rows, sketched above it.
+
+    Returns (DataFrame indexed by q, {column: normalized rank error}).
+    """
+    numeric = df.select_dtypes(include=[np.number])
+    if len(numeric) <= threshold:
+        return numeric.quantile(list(qs)), {col: 0.0 for col in numeric.columns}
+    sketches = {}
+    # Feed the sketch in slices so no column is ever sorted as a whole
+    for start in range(0, len(numeric), threshold):
+        sketch_frame(numeric.iloc[start:start + threshold], k, sketches)
+    return sketch_quantiles(sketches, qs)
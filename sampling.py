@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+from streaming_ingest import ChunkedSource
+
+
+class ReservoirSampler:
+    """Uniform sample of `size` rows from a stream of chunks, in one pass (Algorithm R, vectorised per chunk).
+
+    Every row seen so far has the same chance of being in the sample, however
+    the stream was split into chunks. The same seed and rows give the same
+    sample, whatever the chunk size. `sample()` returns the kept rows in stream order.
+    """
+
+    def __init__(self, size, seed=None):
+        if size < 0:
+            raise ValueError("Sample size must be non-negative")
+        self.size = size
+        self.rng = np.random.default_rng(seed)
+        self.seen = 0
+        self._rows = None
+        self._positions = np.empty(0, dtype=np.int64)
+
+    def update(self, chunk):
+        """Offer every row of a chunk to the reservoir and return self."""
+        positions = np.arange(self.seen, self.seen + len(chunk))
+        self.seen += len(chunk)
+        if self._rows is None:
+            self._rows = chunk.iloc[:0]
+
+        # Fill the reservoir first; row t (0-based) after that replaces a random slot with probability size / (t + 1)
+        free = max(self.size - len(self._positions), 0)
+        if free:
+            self._rows = pd.concat([self._rows, chunk.iloc[:free]]) if len(self._rows) else chunk.iloc[:free]
+            self._positions = np.concatenate([self._positions, positions[:free]])
+        rest = positions[free:]
+        if not len(rest) or not self.size:
+            return self
+        slots = np.floor(self.rng.random(len(rest)) * (rest + 1)).astype(np.int64)
+        accepted = np.flatnonzero(slots < self.size)
+        if not len(accepted):
+            return self
+        # When several rows of this chunk land on one slot only the last survives
+        slots, last = np.unique(slots[accepted][::-1], return_index=True)
+        accepted = accepted[::-1][last] + free
+        # Replace slots in place, so the sample does not depend on how the stream was chunked
+        order = np.arange(len(self._positions))
+        order[slots] = len(order) + np.arange(len(slots))
+        self._rows = pd.concat([self._rows, chunk.iloc[accepted]]).iloc[order]
+        self._positions[slots] = positions[accepted]
+        return self
+
+    def sample(self):
+        """The sampled rows, in the order they appeared in the stream."""
+        if self._rows is None:
+            return pd.DataFrame()
+        return self._rows.iloc[np.argsort(self._positions, kind="stable")]
+
+
+class StratifiedSampler:
+    """Sample of about `size` rows stratified by the values of `column`, in one pass.
+
+    Each stratum keeps its own reservoir. With allocation="proportional" the
+    final sample takes from each stratum in proportion to how many of its rows
+    were seen; with allocation="equal" every stratum gets the same share.
+    Missing values form a stratum of their own.
+    """
+
+    def __init__(self, column, size, seed=None, allocation="proportional"):
+        if allocation not in ("proportional", "equal"):
+            raise ValueError(f"Unknown allocation: {allocation}")
+        self.column = column
+        self.size = size
+        self.seed = seed
+        self.allocation = allocation
+        self.rng = np.random.default_rng(seed)
+        self.strata = {}
+
+    def update(self, chunk):
+        """Route each row of a chunk to its stratum's reservoir and return self."""
+        for key, rows in chunk.groupby(self.column, sort=False, dropna=False):
+            key = None if pd.isna(key) else key  # NaN != NaN, so give missing values one stable key
+            if key not in self.strata:
+                # Seed each stratum from the sampler's generator so results do not depend on timing
+                self.strata[key] = ReservoirSampler(self.size, seed=int(self.rng.integers(2 ** 32)))
+            self.strata[key].update(rows)
+        return self
+
+    def quotas(self):
+        """Rows to draw from each stratum (largest-remainder rounding)."""
+        keys = list(self.strata)
+        if not keys:
+            return {}
+        seen = np.array([self.strata[key].seen for key in keys], dtype="float64")
+        weights = seen if self.allocation == "proportional" else np.ones(len(keys))
+        total = min(self.size, seen.sum())
+        exact = weights / weights.sum() * total
+        quotas = np.floor(exact).astype(int)
+        quotas[np.argsort(quotas - exact, kind="stable")[:int(total - quotas.sum())]] += 1
+        return {key: int(min(quota, count)) for key, quota, count in zip(keys, quotas, seen)}
+
+    def sample(self):
+        """The stratified sample, in stream order."""
+        parts, positions = [], []
+        rng = np.random.default_rng(self.seed)
+        for key, quota in self.quotas().items():
+            sampler = self.strata[key]
+            # A uniform subsample of a uniform reservoir is still uniform over the stratum
+            chosen = np.sort(rng.choice(len(sampler._positions), size=quota, replace=False))
+            parts.append(sampler._rows.iloc[chosen])
+            positions.append(sampler._positions[chosen])
+        if not parts:
+            return pd.DataFrame()
+        return pd.concat(parts).iloc[np.argsort(np.concatenate(positions), kind="stable")]
+
+
+def sample_source(source, size, seed=0, stratify_by=None, allocation="proportional", chunksize=100_000):
+    """Draw a seeded sample of `size` rows in one streaming pass.
+
+    `source` can be a DataFrame, an iterable of chunks (such as a
+    ChunkedSource) or a file path/object, which is streamed with a
+    ChunkedSource. With `stratify_by`, the sample is stratified by that column.
+    """
+    if isinstance(source, pd.DataFrame):
+        chunks = [source]
+    elif isinstance(source, str) or hasattr(source, "read"):
+        chunks = ChunkedSource(source, chunksize=chunksize)
+    else:
+        chunks = source
+    if stratify_by is None:
+        sampler = ReservoirSampler(size, seed)
+    else:
+        sampler = StratifiedSampler(stratify_by, size, seed, allocation)
+    for chunk in chunks:
+        sampler.update(chunk)
+    return sampler.sample()
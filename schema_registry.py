@@ -0,0 +1,144 @@
+import os
+import json
+import hashlib
+import warnings
+import numpy as np
+import pandas as pd
+from type_inference import infer_types
+
+# Integers are never downcast below this, so ordinary arithmetic on them (e.g. squaring) does not wrap
+MIN_INT_DTYPES = {"int": "int32", "uint": "uint32"}
+
+
+def memory_bytes(df):
+    """Deep in-memory size of a DataFrame, including the contents of object columns."""
+    return int(df.memory_usage(deep=True).sum())
+
+
+def learn_dtypes(df, max_category_ratio=0.5, float_rtol=1e-6):
+    """Learn compact dtypes for a frame: {column: dtype}, with "datetime" for parsed dates.
+
+    Text columns that fully parse as dates become datetimes (probed on a
+    sample first, see type_inference) and low-cardinality text becomes
+    categorical; other text keeps the reader's string type. Integers are
+    downcast to the smallest type that holds them, but not below 32 bits, and
+    floats to float32 when that changes no value by more than `float_rtol`.
+    """
+    dtypes = {}
+    text_kinds = infer_types(df.select_dtypes(exclude=["number", "bool", "datetime", "datetimetz"]))
+    for col in df.columns:
+        series = df[col]
+        non_null = series.dropna()
+        if pd.api.types.is_bool_dtype(series):
+            dtypes[col] = "bool" if series.notna().all() else "boolean"
+        elif pd.api.types.is_datetime64_any_dtype(series):
+            dtypes[col] = "datetime"
+        elif pd.api.types.is_integer_dtype(series):
+            dtype = pd.to_numeric(series, downcast="integer").dtype
+            floor = np.dtype(MIN_INT_DTYPES["uint" if dtype.kind == "u" else "int"])
+            dtypes[col] = str(dtype if dtype.itemsize >= floor.itemsize else floor)
+        elif pd.api.types.is_float_dtype(series):
+            as_float32 = non_null.astype("float32").astype("float64")
+            fits = np.allclose(as_float32, non_null, rtol=float_rtol, atol=0) if len(non_null) else True
+            dtypes[col] = "float32" if fits else "float64"
+        else:
+            if text_kinds.get(col) == "datetime_text":
+                dtypes[col] = "datetime"
+            elif len(series) and series.nunique() <= max_category_ratio * len(series):
+                dtypes[col] = "category"
+    return dtypes
+
+
+def _is_int_dtype(dtype):
+    return dtype.startswith(("int", "uint"))
+
+
+def apply_dtypes(df, dtypes):
+    """Cast a frame to learned dtypes, leaving unknown columns as they are.
+
+    Raises ValueError when values no longer fit a learned integer type, since
+    numpy would silently wrap them.
+    """
+    df = df.copy()
+    for col, dtype in dtypes.items():
+        if col not in df.columns or str(df[col].dtype) == dtype:
+            continue
+        if _is_int_dtype(dtype) and len(df[col]):
+            limits = np.iinfo(dtype)
+            if df[col].min() < limits.min or df[col].max() > limits.max:
+                raise ValueError(f"Column {col} no longer fits in {dtype}")
+        if dtype == "datetime":
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                df[col] = pd.to_datetime(df[col], errors="coerce")
+        else:
+            df[col] = df[col].astype(dtype)
+    return df
+
+
+class SchemaRegistry:
+    """Per-dataset record of learned dtypes, stored as datasets/<name>/schema.json.
+
+    The first load of a dataset learns compact dtypes; later loads hand them
+    to the reader so pandas skips type inference and builds the compact
+    frame directly.
+    """
+
+    def __init__(self, base_folder="datasets"):
+        self.base_folder = base_folder
+
+    def _path(self, dataset_name):
+        return os.path.join(self.base_folder, dataset_name, "schema.json")
+
+    def get(self, dataset_name):
+        """Return the stored schema for a dataset, or None if it has not been learned yet."""
+        try:
+            with open(self._path(dataset_name), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, dataset_name, schema):
+        path = self._path(dataset_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(schema, f, indent=2)
+
+    @staticmethod
+    def fingerprint(schema):
+        """Short hash of a schema's dtypes, e.g. to key caches of frames built with it."""
+        if schema is None:
+            return "none"
+        payload = json.dumps(schema["dtypes"], sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+    def learn(self, dataset_name, df):
+        """Learn and store a schema from a freshly parsed frame; return (schema, compact frame)."""
+        dtypes = learn_dtypes(df)
+        compact = apply_dtypes(df, dtypes)
+        schema = {
+            "dtypes": dtypes,
+            "memory_before_bytes": memory_bytes(df),
+            "memory_after_bytes": memory_bytes(compact),
+        }
+        self.save(dataset_name, schema)
+        return schema, compact
+
+    @staticmethod
+    def read_csv_kwargs(schema):
+        """read_csv arguments that apply a schema while parsing.
+
+        Integer columns are left out: read_csv wraps values that overflow the
+        given type, so they are downcast with a range check afterwards.
+        """
+        dtypes = schema["dtypes"]
+        return {
+            "dtype": {col: dtype for col, dtype in dtypes.items() if dtype != "datetime" and not _is_int_dtype(dtype)},
+            "parse_dates": [col for col, dtype in dtypes.items() if dtype == "datetime"],
+        }
+
+    @staticmethod
+    def report(dataset_name, schema):
+        before, after = schema["memory_before_bytes"], schema["memory_after_bytes"]
+        ratio = before / after if after else float("nan")
+        print(f"Schema for {dataset_name}: {before / 1e6:.2f} MB -> {after / 1e6:.2f} MB in memory ({ratio:.1f}x smaller)")
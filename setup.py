@@ -15,7 +15,8 @@ setup(
         "scikit-learn",
         "mlflow",
         "openai",
-        "statsmodels"
+        "statsmodels",
+        "pyarrow"
     ],
     entry_points={
         "console_scripts": [
@@ -0,0 +1,155 @@
+import os
+import warnings
+import numpy as np
+import pandas as pd
+
+# Next wider schema type for a column whose values stop fitting its inferred type
+WIDER_DTYPES = {
+    "Int64": "float64",
+    "float64": "object",
+    "boolean": "object",
+    "datetime64[ns]": "object",
+}
+
+
+def _file_type(source):
+    name = source if isinstance(source, str) else getattr(source, "name", "")
+    return os.path.splitext(name)[1].lstrip(".").lower()
+
+
+def infer_schema(sample):
+    """Infer one dtype per column from a sample frame.
+
+    Integers use the nullable Int64 dtype so later chunks with missing values
+    keep the same schema; text columns that fully parse as dates become datetimes.
+    """
+    schema = {}
+    for col in sample.columns:
+        series = sample[col]
+        if pd.api.types.is_bool_dtype(series):
+            schema[col] = "boolean"
+        elif pd.api.types.is_integer_dtype(series):
+            schema[col] = "Int64"
+        elif pd.api.types.is_float_dtype(series):
+            schema[col] = "float64"
+        elif pd.api.types.is_datetime64_any_dtype(series):
+            schema[col] = "datetime64[ns]"
+        else:
+            non_null = series.dropna()
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                parsed = pd.to_datetime(non_null, errors="coerce")
+            if len(non_null) and parsed.notna().all():
+                schema[col] = "datetime64[ns]"
+            else:
+                schema[col] = "object"
+    return schema
+
+
+class ChunkedSource:
+    """Re-iterable stream of typed DataFrame chunks from a CSV, JSON Lines, JSON or Excel source.
+
+    The schema is inferred once from the first `sample_rows` rows (or given
+    explicitly) and every chunk is conformed to it, so chunks share the same
+    columns and dtypes. When a later chunk holds values the schema cannot
+    represent, the column is widened (Int64 -> float64 -> object; boolean and
+    datetime -> object) rather than losing them: chunks from then on use the
+    wider type and the change is logged and recorded in `widened`. `coerced`
+    counts any values that were still lost. CSV and JSON Lines are read
+    incrementally; plain JSON and Excel cannot be streamed, so they are loaded
+    once and then sliced.
+    """
+
+    def __init__(self, source, chunksize=100_000, schema=None, sample_rows=10_000, file_type=None):
+        self.source = source
+        self.chunksize = chunksize
+        self.sample_rows = sample_rows
+        self.file_type = file_type or _file_type(source)
+        self._schema = schema
+        self.coerced = {}
+        self.widened = {}
+
+    def _rewind(self):
+        if hasattr(self.source, "seek"):
+            self.source.seek(0)
+
+    def _readers(self, nrows=None):
+        """Yield raw, un-typed chunks straight from the source."""
+        self._rewind()
+        if self.file_type == "csv":
+            yield from pd.read_csv(self.source, chunksize=self.chunksize, nrows=nrows)
+        elif self.file_type in ("jsonl", "ndjson"):
+            yield from pd.read_json(self.source, lines=True, chunksize=self.chunksize, nrows=nrows)
+        elif self.file_type in ("json", "xlsx", "xls"):
+            df = pd.read_json(self.source) if self.file_type == "json" else pd.read_excel(self.source)
+            if nrows is not None:
+                df = df.head(nrows)
+            for start in range(0, len(df), self.chunksize):
+                yield df.iloc[start:start + self.chunksize]
+        else:
+            raise ValueError(f"Unsupported file format for streaming: {self.file_type}")
+
+    @property
+    def schema(self):
+        """Column -> dtype mapping shared by every chunk."""
+        if self._schema is None:
+            sample = pd.concat(list(self._readers(nrows=self.sample_rows)), ignore_index=True)
+            self._schema = infer_schema(sample)
+        return self._schema
+
+    @staticmethod
+    def _convert(series, dtype):
+        if dtype == "Int64":
+            series = pd.to_numeric(series, errors="coerce")
+            # Non-integral values cannot be held by an integer column
+            return series.where(series == np.floor(series)).astype("Int64")
+        if dtype == "float64":
+            return pd.to_numeric(series, errors="coerce").astype("float64")
+        if dtype == "boolean":
+            return series.astype("boolean")
+        if dtype == "datetime64[ns]":
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                return pd.to_datetime(series, errors="coerce").astype("datetime64[ns]")
+        return series.astype(dtype)
+
+    def _conform(self, chunk):
+        chunk = chunk.reindex(columns=list(self.schema))
+        for col, dtype in self.schema.items():
+            raw = chunk[col]
+            if str(raw.dtype) == dtype:
+                continue
+            before = raw.notna().sum()
+            try:
+                series = self._convert(raw, dtype)
+            except (TypeError, ValueError):
+                series = raw.iloc[:0]  # e.g. text that cannot become boolean: widen below
+            # Widen instead of silently dropping values that do not fit the inferred type
+            while len(series) != len(raw) or series.notna().sum() < before:
+                wider = WIDER_DTYPES.get(dtype)
+                if wider is None:
+                    break
+                print(f"Column {col}: values do not fit {dtype}, widening to {wider}")
+                self.widened[col] = wider
+                self._schema[col] = dtype = wider
+                series = self._convert(raw, dtype)
+            lost = int(before - series.notna().sum())
+            if lost:
+                self.coerced[col] = self.coerced.get(col, 0) + lost
+                print(f"Column {col}: {lost} values could not be represented as {dtype}")
+            chunk[col] = series
+        return chunk
+
+    def __iter__(self):
+        self.schema  # Infer up front: inference rewinds the source
+        row_offset = 0
+        for chunk in self._readers():
+            chunk = self._conform(chunk)
+            # Keep a global row index so chunks can be told apart and re-joined
+            chunk.index = pd.RangeIndex(row_offset, row_offset + len(chunk))
+            row_offset += len(chunk)
+            yield chunk
+
+    def head(self):
+        """Return the first chunk, e.g. as a bounded working frame for interactive views."""
+        return next(iter(self), pd.DataFrame(columns=list(self.schema)))
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+from cardinality_sketch import HyperLogLog, HeavyHitters, ColumnSketch, profile_columns, _hash
+
+
+def test_distinct_counts_are_within_the_relative_error():
+    rng = np.random.default_rng(0)
+    for distinct in (1_000, 100_000, 1_000_000):
+        values = pd.Series(rng.permutation(distinct).repeat(2))
+        hll = HyperLogLog()
+        for start in range(0, len(values), 300_000):
+            hll.update_hashes(_hash(values.iloc[start:start + 300_000]))
+        # Three standard errors
+        assert abs(hll.count() - distinct) <= 3 * hll.relative_error() * distinct
+
+
+def test_merged_sketches_match_a_single_pass():
+    values = pd.Series(np.random.default_rng(1).integers(0, 50_000, 200_000))
+    whole = ColumnSketch().update(values)
+    parts = [ColumnSketch().update(values.iloc[start:start + 30_000]) for start in range(0, len(values), 30_000)]
+    merged = parts[0]
+    for part in parts[1:]:
+        merged.merge(part)
+    np.testing.assert_array_equal(merged.hll.registers, whole.hll.registers)
+    assert merged.summary()["distinct"] == whole.summary()["distinct"]
+
+
+def test_heavy_hitter_counts_are_within_the_error():
+    rng = np.random.default_rng(2)
+    values = pd.Series(np.minimum(rng.zipf(1.5, 300_000), 5_000))
+    heavy = HeavyHitters(20)
+    for start in range(0, len(values), 25_000):
+        heavy.update_counts(values.iloc[start:start + 25_000].value_counts())
+    exact = values.value_counts()
+    top = heavy.top()
+    # Reported counts are lower bounds, at most `error` below the true count
+    assert (top <= exact[top.index]).all()
+    assert (top >= exact[top.index] - heavy.error).all()
+    # Every value more frequent than the error bound is kept
+    assert set(exact[exact > heavy.error].index) <= set(top.index)
+
+
+def test_profile_columns_sketches_only_large_high_cardinality_columns():
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame({"ids": np.arange(300_000), "codes": rng.integers(0, 10, 300_000)})
+    profiles = profile_columns(df, threshold=100_000)
+    assert profiles["ids"]["distinct_relative_error"] > 0
+    assert abs(profiles["ids"]["distinct"] - 300_000) <= 3 * profiles["ids"]["distinct_relative_error"] * 300_000
+    assert profiles["codes"] == profile_columns(df[["codes"]], exact=True)["codes"]
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+from comoments import CoMoments
+
+
+def _frame(rows=20_000, seed=0):
+    rng = np.random.default_rng(seed)
+    x = rng.normal(size=rows)
+    df = pd.DataFrame({
+        "x": x,
+        "y": 2 * x + rng.normal(size=rows),
+        # A large offset is where naive sum-of-products formulas lose precision
+        "offset": 1e6 + x + rng.normal(size=rows),
+        "noise": rng.exponential(size=rows),
+    })
+    # Different missing rows per column, so each pair has its own complete rows
+    for col, rate in (("x", 0.05), ("y", 0.1), ("noise", 0.2)):
+        df.loc[rng.random(rows) < rate, col] = np.nan
+    return df
+
+
+def _splits(df, seed=0):
+    rng = np.random.default_rng(seed)
+    cuts = np.sort(rng.choice(np.arange(1, len(df)), 25, replace=False))
+    bounds = [0, *cuts, len(df)]
+    yield "whole", [df]
+    yield "equal", [df.iloc[start:start + 1_000] for start in range(0, len(df), 1_000)]
+    yield "uneven", [df.iloc[start:stop] for start, stop in zip([0, 1, 8, 1_000], [1, 8, 1_000, len(df)])]
+    yield "random", [df.iloc[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+
+
+def test_merged_correlation_and_covariance_match_pandas_for_any_split():
+    df = _frame()
+    for name, chunks in _splits(df):
+        merged = CoMoments.combine(CoMoments.from_frame(chunk) for chunk in chunks)
+        pd.testing.assert_frame_equal(merged.corr(), df.corr(), rtol=1e-9, obj=f"corr, {name}")
+        pd.testing.assert_frame_equal(merged.cov(), df.cov(), rtol=1e-9, obj=f"cov, {name}")
+
+
+def test_update_matches_merge():
+    df = _frame(seed=1)
+    streamed = CoMoments()
+    for start in range(0, len(df), 3_000):
+        streamed.update(df.iloc[start:start + 3_000])
+    pd.testing.assert_frame_equal(streamed.corr(), df.corr(), rtol=1e-9)
+
+
+def test_column_missing_from_some_chunks():
+    df = _frame(seed=2)
+    chunks = [df.iloc[:5_000].drop(columns="noise"), df.iloc[5_000:]]
+    merged = CoMoments.combine(CoMoments.from_frame(chunk) for chunk in chunks)
+    # Rows of the chunk without the column count as missing for every pair that involves it
+    expected = df.copy()
+    expected.loc[expected.index[:5_000], "noise"] = np.nan
+    pd.testing.assert_frame_equal(merged.corr().loc[expected.columns, expected.columns], expected.corr(), rtol=1e-9)
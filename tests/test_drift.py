@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+from drift import ReferenceProfile, detect_drift
+
+
+def _frame(rows=200_000, seed=0):
+    rng = np.random.default_rng(seed)
+    zipf = np.minimum(rng.zipf(1.3, rows), 10_000)
+    return pd.DataFrame({
+        "x": rng.normal(size=rows),
+        "uniform": rng.integers(0, 80, rows).astype(str),
+        "zipf": zipf.astype(str),
+    })
+
+
+def _chunks(df, size=30_000):
+    return [df.iloc[start:start + size] for start in range(0, len(df), size)]
+
+
+def test_reference_compared_with_itself_reports_no_drift():
+    df = _frame()
+    for reference, current in ((df, df), (_chunks(df), _chunks(df))):
+        report = detect_drift(ReferenceProfile.build(reference), current)
+        assert set(report) == {"x", "uniform", "zipf"}
+        for col, result in report.items():
+            assert not result["drift"], col
+            # Numeric CDFs come from a quantile sketch, categorical counts are exact
+            assert result["psi"] < 1e-3, col
+        for col in ("uniform", "zipf"):
+            assert report[col]["psi"] < 1e-9
+            assert report[col]["chi2_stat"] < 1e-6
+            assert report[col]["p_value"] > 0.99
+
+
+def test_shifted_categories_are_reported():
+    df = _frame()
+    shifted = df.copy()
+    shifted.loc[shifted.index[:100_000], "uniform"] = "0"
+    report = detect_drift(ReferenceProfile.build(df), shifted)
+    assert report["uniform"]["drift"]
+    assert not report["x"]["drift"]
+
+
+def test_high_cardinality_columns_are_reported_as_untracked():
+    df = _frame(rows=50_000)
+    df["id"] = [f"id-{i}" for i in range(len(df))]
+    reference = ReferenceProfile.build(df)
+    assert reference.categorical["id"]["untracked"]
+    assert not reference.categorical["zipf"]["untracked"]
+    report = detect_drift(reference, df)
+    assert report["id"]["status"] == "untracked (high cardinality)"
+    assert not report["id"]["drift"]
+    assert report["id"]["missing_rate"] == 0.0
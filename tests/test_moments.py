@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+from moments import Moments
+
+
+def _frame(rows=20_000, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "normal": rng.normal(size=rows),
+        # A large offset is where naive sum-of-powers formulas lose precision
+        "offset": 1e6 + rng.normal(size=rows),
+        "skewed": rng.exponential(size=rows),
+        "ints": rng.integers(0, 100, rows),
+    })
+    df.loc[rng.random(rows) < 0.1, "normal"] = np.nan
+    return df
+
+
+def _splits(df, seed=0):
+    rng = np.random.default_rng(seed)
+    cuts = np.sort(rng.choice(np.arange(1, len(df)), 25, replace=False))
+    yield "whole", [df]
+    yield "equal", [df.iloc[start:start + 1_000] for start in range(0, len(df), 1_000)]
+    yield "uneven", [df.iloc[start:stop] for start, stop in zip([0, 1, 8, 1_000], [1, 8, 1_000, len(df)])]
+    bounds = [0, *cuts, len(df)]
+    yield "random", [df.iloc[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+
+
+def _expected(df):
+    return pd.DataFrame({
+        "count": df.count(), "mean": df.mean(), "std": df.std(), "min": df.min(), "max": df.max(),
+        "skew": df.skew(), "kurt": df.kurt(),
+    }).T.astype("float64")
+
+
+def test_merged_moments_match_pandas_for_any_split():
+    df = _frame()
+    expected = _expected(df)
+    for name, chunks in _splits(df):
+        result = Moments.combine(Moments.from_frame(chunk) for chunk in chunks).describe()
+        pd.testing.assert_frame_equal(result.loc[expected.index, expected.columns], expected, rtol=1e-9, obj=name)
+
+
+def test_merge_order_does_not_matter():
+    df = _frame(seed=1)
+    parts = [Moments.from_frame(df.iloc[start:start + 3_000]) for start in range(0, len(df), 3_000)]
+    forward = Moments.combine(parts).describe()
+    backward = Moments.combine(reversed(parts)).describe()
+    pd.testing.assert_frame_equal(forward, backward, rtol=1e-9)
+
+
+def test_column_missing_from_some_chunks():
+    df = _frame(seed=2)
+    chunks = [df.iloc[:5_000].drop(columns="skewed"), df.iloc[5_000:]]
+    result = Moments.combine(Moments.from_frame(chunk) for chunk in chunks).describe()
+    skewed = df["skewed"].iloc[5_000:]
+    assert result.at["count", "skewed"] == len(skewed)
+    np.testing.assert_allclose(result.at["mean", "skewed"], skewed.mean(), rtol=1e-12)
+    np.testing.assert_allclose(result.at["std", "skewed"], skewed.std(), rtol=1e-9)
+    np.testing.assert_allclose(result.at["mean", "normal"], df["normal"].mean(), rtol=1e-12)
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+from quantile_sketch import KLLSketch, merge_sketches, column_quantiles
+
+QS = np.linspace(0.01, 0.99, 99)
+
+
+def _true_ranks(data, values):
+    return np.searchsorted(np.sort(data), values, side="right") / len(data)
+
+
+def test_quantiles_are_within_the_rank_error_bound():
+    for seed in range(3):
+        data = np.random.default_rng(seed).lognormal(size=200_000)
+        streamed = KLLSketch(200, seed=seed)
+        for chunk in np.array_split(data, 20):
+            streamed.update(chunk)
+        merged = merge_sketches(
+            {"x": KLLSketch(200, seed=seed + i).update(chunk)} for i, chunk in enumerate(np.array_split(data, 7))
+        )["x"]
+        for sketch in (streamed, merged):
+            assert not sketch.is_exact
+            assert sketch.n == len(data)
+            bound = sketch.rank_error()
+            assert np.abs(_true_ranks(data, sketch.quantiles(QS)) - QS).max() <= bound
+            probes = np.quantile(data, QS)
+            assert np.abs(sketch.cdf(probes) - _true_ranks(data, probes)).max() <= bound
+            assert sketch.quantile(0) == data.min() and sketch.quantile(1) == data.max()
+
+
+def test_small_inputs_are_exact():
+    data = np.random.default_rng(0).normal(size=150)
+    sketch = KLLSketch(200, seed=0).update(data)
+    assert sketch.is_exact and sketch.rank_error() == 0.0
+    np.testing.assert_allclose(sketch.quantiles(QS), pd.Series(data).quantile(QS).to_numpy())
+
+
+def test_column_quantiles_switch_to_sketches_above_the_threshold():
+    df = pd.DataFrame({"x": np.random.default_rng(1).normal(size=50_000)})
+    exact, exact_errors = column_quantiles(df, [0.25, 0.5, 0.75])
+    pd.testing.assert_frame_equal(exact, df.quantile([0.25, 0.5, 0.75]))
+    assert exact_errors == {"x": 0.0}
+
+    sketched, errors = column_quantiles(df, [0.25, 0.5, 0.75], threshold=10_000)
+    assert 0 < errors["x"] < 0.02
+    ranks = _true_ranks(df["x"].to_numpy(), sketched["x"].to_numpy())
+    assert np.abs(ranks - [0.25, 0.5, 0.75]).max() <= errors["x"]
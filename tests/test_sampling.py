@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+from sampling import ReservoirSampler, StratifiedSampler, sample_source
+
+
+def _frame(rows=10_000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({"id": np.arange(rows), "group": rng.choice(["a", "b", "c"], rows, p=[0.6, 0.3, 0.1])})
+
+
+def _chunks(df, size):
+    return [df.iloc[start:start + size] for start in range(0, len(df), size)]
+
+
+def test_sample_does_not_depend_on_chunking():
+    df = _frame()
+    expected = sample_source(df, 500, seed=7)
+    assert len(expected) == 500 and expected["id"].is_unique
+    for size in (1, 37, 1_000, 4_999):
+        pd.testing.assert_frame_equal(sample_source(_chunks(df, size), 500, seed=7), expected)
+
+
+def test_every_row_is_equally_likely():
+    df = _frame(rows=100)
+    trials = 1_500
+    hits = np.zeros(len(df))
+    for seed in range(trials):
+        sampler = ReservoirSampler(10, seed=seed)
+        for chunk in _chunks(df, 1 + seed % 30):
+            sampler.update(chunk)
+        hits[sampler.sample()["id"].to_numpy()] += 1
+    expected = trials * 10 / len(df)
+    # Five standard deviations of a binomial count per row
+    assert np.abs(hits - expected).max() <= 5 * np.sqrt(expected * (1 - 10 / len(df)))
+
+
+def test_short_streams_are_kept_whole():
+    df = _frame(rows=50)
+    pd.testing.assert_frame_equal(sample_source(_chunks(df, 7), 100, seed=0), df)
+
+
+def test_stratified_quotas_follow_the_allocation():
+    df = _frame()
+    seen = df["group"].value_counts()
+    proportional = StratifiedSampler("group", 1_000, seed=0)
+    equal = StratifiedSampler("group", 999, seed=0, allocation="equal")
+    for chunk in _chunks(df, 1_234):
+        proportional.update(chunk)
+        equal.update(chunk)
+    counts = proportional.sample()["group"].value_counts()
+    assert counts.sum() == 1_000
+    assert (np.abs(counts - seen / seen.sum() * 1_000) < 1).all()
+    assert equal.sample()["group"].value_counts().to_dict() == {"a": 333, "b": 333, "c": 333}
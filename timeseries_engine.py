@@ -0,0 +1,145 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from downsample import downsample_arrays
+
+# Finest bucket kept by chunk partials; coarsened once the full date range is known
+PARTIAL_FREQ = pd.offsets.Hour()
+
+
+def resample_freq(date_min, date_max):
+    """Resampling frequency for an irregular series spanning [date_min, date_max]."""
+    days = (date_max - date_min).days
+    if days > 365 * 2:
+        return pd.offsets.MonthEnd()
+    elif days > 30:
+        return pd.offsets.Day()
+    return pd.offsets.Hour()
+
+
+def _decompose(values, period):
+    """Seasonal decomposition of one regular series; runs in a worker process."""
+    from statsmodels.tsa.seasonal import seasonal_decompose
+    result = seasonal_decompose(values, period=period)
+    return np.asarray(result.trend), np.asarray(result.seasonal), np.asarray(result.resid)
+
+
+class TimeSeriesEngine:
+    """Batched seasonal decomposition of every numeric series against each date column.
+
+    Each date column is sorted and (if irregular) resampled once into an
+    aligned matrix, and all of its numeric series are decomposed from that
+    matrix, on a process pool once there is enough work. Results hold numpy
+    arrays (index, trend, seasonal, resid) rather than lists, optionally
+    downsampled to about `max_points` with LTTB. Series that fail to decompose are reported
+    in `errors` instead of being dropped silently.
+    """
+
+    def __init__(self, max_workers=None, max_points=None, min_parallel_points=1_000_000):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_points = max_points
+        self.min_parallel_points = min_parallel_points
+        self.errors = {}
+
+    def aligned_matrix(self, df, date_col, numeric_cols):
+        """Numeric columns indexed by the sorted date column, resampled to a regular frequency if needed."""
+        dates = pd.to_datetime(df[date_col], errors="coerce")
+        matrix = df[numeric_cols].set_index(dates.rename(date_col))
+        matrix = matrix[matrix.index.notna()].sort_index()
+        if len(matrix) < 2:
+            return matrix
+        if matrix.index.inferred_freq is None:
+            freq = resample_freq(matrix.index.min(), matrix.index.max())
+            matrix = matrix.resample(freq).mean()
+        return matrix
+
+    def decompose_matrix(self, matrix, date_col, max_points=None):
+        """Decompose every column of an aligned matrix; return {"<column>_vs_<date_col>": result}."""
+        tasks = {}
+        for col in matrix.columns:
+            series = matrix[col].dropna()
+            if len(series) >= 4:  # seasonal_decompose needs two full cycles of a period >= 2
+                tasks[f"{col}_vs_{date_col}"] = series
+
+        total_points = sum(len(series) for series in tasks.values())
+        if len(tasks) > 1 and self.max_workers > 1 and total_points >= self.min_parallel_points:
+            with ProcessPoolExecutor(max_workers=min(self.max_workers, len(tasks))) as executor:
+                futures = {
+                    key: executor.submit(_decompose, series.to_numpy(dtype="float64"), min(len(series) // 2, 12))
+                    for key, series in tasks.items()
+                }
+                outcomes = {key: future.exception() or future.result() for key, future in futures.items()}
+        else:
+            outcomes = {}
+            for key, series in tasks.items():
+                try:
+                    outcomes[key] = _decompose(series.to_numpy(dtype="float64"), min(len(series) // 2, 12))
+                except Exception as e:
+                    outcomes[key] = e
+
+        results = {}
+        for key, outcome in outcomes.items():
+            if isinstance(outcome, Exception):
+                self.errors[key] = str(outcome)
+                print(f"Time series decomposition failed for {key}: {outcome}")
+                continue
+            series = tasks[key]
+            # Shape-preserving (LTTB) downsampling keeps each component's peaks and troughs
+            index, (trend, seasonal, resid) = downsample_arrays(
+                series.index.to_numpy(), outcome, max_points or self.max_points
+            )
+            results[key] = {
+                "index": index,
+                "trend": trend,
+                "seasonal": seasonal,
+                "resid": resid,
+                "frequency": series.index.inferred_freq,
+                "period": min(len(series) // 2, 12),
+                "data_points": len(series),
+            }
+        return results
+
+    def analyze(self, df, date_columns, numeric_cols=None, max_points=None):
+        """Decompose each numeric column of `df` against each date column."""
+        if numeric_cols is None:
+            numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+        results = {}
+        for date_col in date_columns:
+            cols = [col for col in numeric_cols if col != date_col]
+            if cols:
+                results.update(self.decompose_matrix(self.aligned_matrix(df, date_col, cols), date_col, max_points))
+        return results
+
+    # --- Mergeable per-period partials for chunked data ---
+    @staticmethod
+    def period_partials(df, date_col, numeric_cols=None, freq=PARTIAL_FREQ):
+        """Per-period sums and counts of numeric columns in one chunk, to be merged across chunks."""
+        if numeric_cols is None:
+            numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+        cols = [col for col in numeric_cols if col != date_col]
+        periods = pd.to_datetime(df[date_col], errors="coerce").dt.floor(freq)
+        grouped = df[cols].groupby(periods)
+        return {"sum": grouped.sum(), "count": grouped.count()}
+
+    @staticmethod
+    def merge_partials(parts):
+        """Merge period partials from several chunks."""
+        parts = [part for part in parts if part is not None]
+        if not parts:
+            return None
+        return {
+            key: pd.concat([part[key] for part in parts]).groupby(level=0).sum()
+            for key in ("sum", "count")
+        }
+
+    def decompose_partials(self, partials, date_col, max_points=None):
+        """Decompose the merged partials of a date column, coarsened to the frequency its full range calls for."""
+        if partials is None or len(partials["sum"]) < 2:
+            return {}
+        index = partials["sum"].index
+        freq = resample_freq(index.min(), index.max())
+        sums = partials["sum"].resample(freq).sum()
+        counts = partials["count"].resample(freq).sum()
+        means = sums / counts.where(counts > 0)
+        return self.decompose_matrix(means, date_col, max_points)
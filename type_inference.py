@@ -0,0 +1,74 @@
+import warnings
+import pandas as pd
+
+# Plain decimal or scientific notation, optionally signed, with surrounding whitespace
+NUMBER_PATTERN = r"\s*[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?\s*"
+# Anything date-like has digits and a date/time separator, which rules out most free text cheaply
+DATE_HINT_PATTERN = r"\d.*[-/:.\s]|[-/:.\s].*\d"
+
+NUMERIC_KINDS = ("numeric", "numeric_text")
+DATETIME_KINDS = ("datetime", "datetime_text")
+
+
+def _to_datetime(values):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return pd.to_datetime(values, errors="coerce")
+
+
+def _text_kind(series, sample_size, seed):
+    non_null = series.dropna()
+    if non_null.empty:
+        return "text"
+    sample = non_null.sample(min(sample_size, len(non_null)), random_state=seed).astype(str)
+
+    # Probe the sample with vectorised string ops, then confirm candidates on the full column
+    if sample.str.fullmatch(NUMBER_PATTERN).all():
+        if pd.to_numeric(non_null.astype(str), errors="coerce").notna().all():
+            return "numeric_text"
+    elif sample.str.contains(DATE_HINT_PATTERN).all() and _to_datetime(sample).notna().all():
+        if _to_datetime(non_null.astype(str)).notna().all():
+            return "datetime_text"
+    return "text"
+
+
+def infer_types(df, sample_size=1000, seed=0):
+    """Classify every column of a frame and return the type map {column: kind}.
+
+    Kinds are "numeric", "boolean" and "datetime" for columns already stored
+    that way, "numeric_text" and "datetime_text" for text that fully parses
+    as numbers or dates, and "text" otherwise. Text columns are probed on a
+    seeded sample of `sample_size` values; only columns that pass are parsed
+    in full.
+    """
+    type_map = {}
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_bool_dtype(series):
+            type_map[col] = "boolean"
+        elif pd.api.types.is_numeric_dtype(series):
+            type_map[col] = "numeric"
+        elif pd.api.types.is_datetime64_any_dtype(series):
+            type_map[col] = "datetime"
+        else:
+            type_map[col] = _text_kind(series, sample_size, seed)
+    return type_map
+
+
+def columns_of_kind(type_map, kinds):
+    """Columns whose inferred kind is one of `kinds`."""
+    return [col for col, kind in type_map.items() if kind in kinds]
+
+
+def apply_types(df, type_map, kinds=("numeric_text", "datetime_text")):
+    """Convert text columns of the given kinds to real dtypes; return the new frame and updated type map."""
+    df = df.copy()
+    type_map = dict(type_map)
+    for col in columns_of_kind(type_map, kinds):
+        if type_map[col] == "numeric_text":
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+            type_map[col] = "numeric"
+        else:
+            df[col] = _to_datetime(df[col])
+            type_map[col] = "datetime"
+    return df, type_map